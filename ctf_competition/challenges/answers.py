@@ -0,0 +1,108 @@
+"""
+Answer checking.
+
+Each question's accepted answers are compiled once into an AnswerMatcher:
+normalised answers become a set of SHA-256 digests compared with
+``hmac.compare_digest``, and regex answers become precompiled patterns. A
+submission is normalised the same way, so checking it is a hash and a few
+fixed-time comparisons instead of string munging on every request.
+
+``answer_matchers`` caches compiled matchers per question and throws the whole
+cache away whenever the question catalog version changes, i.e. after any
+Question is saved or deleted.
+"""
+import hashlib
+import hmac
+import re
+import threading
+
+from .catalog import question_catalog
+from .models import Question
+
+EXACT = 'exact'
+NORMALIZED = 'normalized'
+REGEX = 'regex'
+
+ANSWER_FIELDS = ('answer', 'alternate_answers', 'answer_mode', 'flag_prefix')
+
+
+def normalize(value):
+    """Case-fold and collapse whitespace runs, so ' Foo  Bar' matches 'foo bar'."""
+    return ' '.join(value.split()).casefold()
+
+
+def accepted_answers(answer, alternate_answers=''):
+    """The primary answer plus one alternate per non-blank line."""
+    answers = [answer]
+    answers.extend(line.strip() for line in (alternate_answers or '').splitlines() if line.strip())
+    return answers
+
+
+class AnswerMatcher:
+    def __init__(self, answer, alternate_answers='', answer_mode=NORMALIZED, flag_prefix=''):
+        self.mode = answer_mode
+        self._wrapper = None
+        if flag_prefix:
+            # Accept both "CTF{secret}" and the bare "secret"
+            self._wrapper = re.compile(r'\s*%s\{(.*)\}\s*' % re.escape(flag_prefix), re.IGNORECASE | re.DOTALL)
+
+        answers = [self.unwrap(value) for value in accepted_answers(answer, alternate_answers)]
+        if answer_mode == REGEX:
+            self._patterns = [re.compile(pattern) for pattern in answers]
+            self._digests = ()
+        else:
+            self._patterns = ()
+            self._digests = tuple({self._digest(value) for value in answers})
+
+    def unwrap(self, value):
+        if self._wrapper is not None:
+            match = self._wrapper.fullmatch(value)
+            if match:
+                return match.group(1)
+        return value
+
+    def _digest(self, value):
+        if self.mode != EXACT:
+            value = normalize(value)
+        return hashlib.sha256(value.encode()).digest()
+
+    def matches(self, submitted):
+        submitted = self.unwrap(submitted)
+        if self._patterns:
+            submitted = submitted.strip()
+            return any(pattern.fullmatch(submitted) for pattern in self._patterns)
+
+        digest = self._digest(submitted)
+        matched = False
+        for accepted in self._digests:  # No early exit: every accepted answer is compared
+            matched |= hmac.compare_digest(digest, accepted)
+        return matched
+
+
+class AnswerMatcherCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._matchers = {}
+
+    def get(self, question_id):
+        version = question_catalog.version
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._matchers = {}
+                    self._version = version
+        matchers = self._matchers
+        matcher = matchers.get(question_id)
+        if matcher is None:
+            row = Question.objects.filter(id=question_id).values_list(*ANSWER_FIELDS).first()
+            if row is None:
+                raise Question.DoesNotExist(question_id)
+            matcher = matchers[question_id] = AnswerMatcher(*row)
+        return matcher
+
+    def check(self, question_id, submitted):
+        return self.get(question_id).matches(submitted)
+
+
+answer_matchers = AnswerMatcherCache()
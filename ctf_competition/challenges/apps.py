@@ -4,3 +4,42 @@ from django.apps import AppConfig
 class ChallengesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'challenges'
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+        from django.db.models.signals import post_delete, post_migrate, post_save
+
+        from .auth import user_cache
+        from .catalog import question_catalog, question_changed
+        from .competition import competition_state
+        from .eventbus import get_event_bus
+        from .fragments import question_fragments
+        from .history import score_history
+        from .leaderboard import leaderboard, player_score_created
+        from .models import PlayerScore, Question
+        from .scoreboard import publisher
+        from .scoring import create_player_score
+        from .streams import check_asgiref
+
+        check_asgiref()
+        bus = get_event_bus()
+        bus.subscribe('score', leaderboard.on_score_event)
+        bus.subscribe('score', score_history.on_score_event)
+        bus.subscribe('score', lambda payload: publisher.notify())
+        bus.subscribe('timer', competition_state.invalidate)
+        bus.subscribe('timer', lambda payload: publisher.notify())
+        bus.subscribe('catalog', question_catalog.invalidate)
+        # Delivery starts from the WSGI/ASGI entry points, so management commands (migrate on a
+        # fresh database included) never start a tailer
+
+        post_save.connect(question_changed, sender=Question, dispatch_uid='catalog_question_saved')
+        post_delete.connect(question_changed, sender=Question, dispatch_uid='catalog_question_deleted')
+        post_migrate.connect(question_changed, sender=self, dispatch_uid='catalog_migrated')
+        post_save.connect(question_fragments.question_changed, sender=Question, dispatch_uid='fragments_question_saved')
+        post_delete.connect(
+            question_fragments.question_changed, sender=Question, dispatch_uid='fragments_question_deleted',
+        )
+        post_save.connect(create_player_score, sender=get_user_model(), dispatch_uid='scoring_user_created')
+        post_save.connect(player_score_created, sender=PlayerScore, dispatch_uid='leaderboard_player_joined')
+        post_save.connect(user_cache.user_changed, sender=get_user_model(), dispatch_uid='user_cache_saved')
+        post_delete.connect(user_cache.user_changed, sender=get_user_model(), dispatch_uid='user_cache_deleted')
@@ -0,0 +1,110 @@
+"""
+Authentication fast path.
+
+Every authenticated request, SSE reconnects included, loads the session and
+then the user. The session is served from the cache by the ``cached_db``
+session engine (see SESSION_ENGINE in settings). ``CachedModelBackend``
+serves the user from a short-lived in-process cache, so neither costs a
+query on the common path. A saved or deleted User is dropped from this
+process's cache immediately. Other processes catch up within ``ttl``
+seconds, which bounds how long a deactivated or demoted account keeps its
+access there.
+
+Logins and registrations are dominated by password hashing, which runs
+PBKDF2 for hundreds of milliseconds of CPU per attempt.
+``ThrottledPBKDF2PasswordHasher`` lets at most
+``CHALLENGES_MAX_CONCURRENT_HASHES`` hashes run at once and queues the
+rest. A burst of logins when the timer starts then leaves CPU for the
+submissions already in flight instead of competing with them all at once.
+"""
+import copy
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class UserCache:
+    max_size = 10_000  # Entries before expired ones are swept out
+
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self._users = {}  # user_id -> (expires, user)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._users)
+
+    def get(self, user_id):
+        """A private copy of the cached user, or None if absent or expired."""
+        entry = self._users.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        # Views may modify request.user; never let them touch the shared instance
+        return copy.copy(entry[1])
+
+    def set(self, user):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._users) >= self.max_size:
+                self._users = {key: entry for key, entry in self._users.items() if entry[0] >= now}
+            self._users[user.pk] = (now + self.ttl, copy.copy(user))
+
+    def invalidate(self, user_id=None):
+        with self._lock:
+            if user_id is None:
+                self._users = {}
+            else:
+                self._users.pop(user_id, None)
+
+    def user_changed(self, sender, instance, **kwargs):
+        """post_save/post_delete handler for the user model."""
+        self.invalidate(instance.pk)
+
+
+user_cache = UserCache()
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend whose ``get_user``, run for every authenticated request, is served from ``user_cache``."""
+
+    def get_user(self, user_id):
+        user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                user_cache.set(user)
+        return user
+
+    async def aget_user(self, user_id):
+        # Cache hits skip the thread hop that the default aget_user takes
+        user = user_cache.get(user_id)
+        if user is None:
+            user = await super().aget_user(user_id)
+        return user
+
+
+_slots = None
+_slots_lock = threading.Lock()
+
+
+def hash_slots():
+    """The semaphore bounding concurrent password hashes in this process."""
+    global _slots
+    if _slots is None:
+        with _slots_lock:
+            if _slots is None:
+                limit = getattr(settings, 'CHALLENGES_MAX_CONCURRENT_HASHES', None)
+                _slots = threading.BoundedSemaphore(limit or max(1, (os.cpu_count() or 2) // 2))
+    return _slots
+
+
+class ThrottledPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2PasswordHasher (same algorithm and hashes) with a cap on concurrent hashing."""
+
+    def encode(self, password, salt, iterations=None):
+        with hash_slots():
+            return super().encode(password, salt, iterations)
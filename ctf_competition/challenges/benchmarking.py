@@ -0,0 +1,78 @@
+"""
+Helpers shared by the ``benchmark_*`` management commands.
+
+Benchmarks never touch the real competition data: they run inside a
+throwaway test database created next to the configured one.
+"""
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import setup_databases, teardown_databases
+
+from .models import PlayerScore
+
+
+@contextmanager
+def throwaway_database(verbosity=0, on_disk=False):
+    """
+    Create the test database for the duration of the block, then drop it.
+
+    SQLite test databases live in shared-cache memory, where concurrent
+    writers fail with "table is locked" instead of waiting. Pass
+    ``on_disk=True`` for multi-threaded benchmarks to use a temporary file.
+    """
+    path = None
+    if on_disk and connection.vendor == 'sqlite':
+        handle, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = path
+    old_config = setup_databases(verbosity=verbosity, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=verbosity)
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+
+
+def best_of(func, repeat=5):
+    """Run ``func`` ``repeat`` times and return the fastest wall time in seconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def create_players(count, score=lambda i: 0, batch_size=5000, password='!'):
+    """Bulk-create ``count`` players, each with a PlayerScore row, and return the users."""
+    users = User.objects.bulk_create(
+        [User(username=f'player{i:07d}', password=password) for i in range(count)],
+        batch_size=batch_size,
+    )
+    if users and users[0].pk is None:  # Backends that do not return primary keys
+        users = list(User.objects.filter(username__startswith='player').order_by('username'))
+    PlayerScore.objects.bulk_create(
+        [PlayerScore(user=user, score=score(i)) for i, user in enumerate(users)],
+        batch_size=batch_size,
+    )
+    return users
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list, or None if it is empty."""
+    if not sorted_values:
+        return None
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def format_table(headers, rows):
+    widths = [max(len(str(cell)) for cell in column) for column in zip(headers, *rows)]
+    lines = ['  '.join(str(cell).ljust(width) for cell, width in zip(row, widths)) for row in [headers, *rows]]
+    lines.insert(1, '  '.join('-' * width for width in widths))
+    return '\n'.join(lines)
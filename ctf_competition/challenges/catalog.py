@@ -0,0 +1,143 @@
+"""
+In-process catalog of questions.
+
+Listing pages only need a question's id, title, points (and current value,
+for dynamically scored questions), category and attempt limit, so the catalog keeps those as small immutable entries grouped by
+category. The heavy parts (description and multiple-choice options) are loaded
+per question on first view and cached alongside.
+
+The catalog is rebuilt only after a Question is saved or deleted. The
+``post_save``/``post_delete`` handlers publish a ``catalog`` event on the
+event bus, and every process then invalidates its copy. Each rebuild gets a
+new ``version`` so caches derived from the catalog can tell when they are
+stale, and copies older than ``max_age`` are rebuilt even if an event was
+missed. A reprice of a dynamic question only changes that question's value:
+its ``catalog`` event carries the new value, which is swapped into the copy
+in place, keeping the version so derived caches stay valid.
+"""
+import threading
+import time
+from dataclasses import dataclass, replace
+
+from django.db.models import Case, F, When
+
+from .models import Question
+
+
+@dataclass(frozen=True)
+class QuestionEntry:
+    id: int
+    title: str
+    points: int
+    category: str
+    max_attempts: int
+    value: int
+
+
+@dataclass(frozen=True)
+class QuestionDetail:
+    id: int
+    title: str
+    points: int
+    category: str
+    max_attempts: int
+    description: str
+    is_multiple_choice: bool
+    option_1: str
+    option_2: str
+    option_3: str
+    option_4: str
+    value: int
+
+
+def _questions():
+    """Questions annotated with ``value``, the points a solver currently holds (as Question.value)."""
+    return Question.objects.annotate(value=Case(
+        When(dynamic_scoring=True, current_points__isnull=False, then=F('current_points')),
+        default=F('points'),
+    ))
+
+
+class Catalog:
+    def __init__(self, entries, version):
+        self.version = version
+        self.entries = {entry.id: entry for entry in entries}
+        self.by_category = {category: [] for category, _ in Question.CATEGORY_CHOICES}
+        for entry in entries:
+            self.by_category.setdefault(entry.category, []).append(entry)
+        self._details = {}
+        self._lock = threading.Lock()
+
+    def category(self, name):
+        return self.by_category.get(name, [])
+
+    def repriced(self, question_id, value):
+        """A copy with one question's ``value`` changed, under the same version."""
+        entries = [
+            replace(entry, value=value) if entry.id == question_id else entry for entry in self.entries.values()
+        ]
+        catalog = Catalog(entries, self.version)
+        catalog._details = {
+            detail_id: replace(detail, value=value) if detail_id == question_id else detail
+            for detail_id, detail in self._details.items()
+        }
+        return catalog
+
+    def detail(self, question_id):
+        """Full question content, loaded from the database once per catalog version."""
+        detail = self._details.get(question_id)
+        if detail is None and question_id in self.entries:
+            row = _questions().filter(id=question_id).values(*QuestionDetail.__dataclass_fields__).first()
+            if row is not None:
+                detail = QuestionDetail(**row)
+                with self._lock:
+                    self._details[question_id] = detail
+        return detail
+
+
+class QuestionCatalog:
+    max_age = 60  # Seconds before a copy is rebuilt even without an invalidation event
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._catalog = None
+        self._built_at = 0
+        self._version = 0
+        self._generation = 0  # Bumped by invalidate() so a rebuild racing with a change is not trusted
+
+    def get(self):
+        catalog = self._catalog
+        if catalog is not None and time.monotonic() - self._built_at < self.max_age:
+            return catalog
+        with self._lock:
+            if self._catalog is catalog:
+                generation = self._generation
+                rows = _questions().order_by('id').values_list(*QuestionEntry.__dataclass_fields__)
+                self._version += 1
+                self._catalog = Catalog([QuestionEntry(*row) for row in rows], self._version)
+                self._built_at = time.monotonic() if generation == self._generation else 0
+            return self._catalog
+
+    @property
+    def version(self):
+        return self.get().version
+
+    def invalidate(self, payload=None):
+        """Drop this process's copy, or reprice one question in it. Usable as an event bus listener."""
+        if payload and 'value' in payload:
+            with self._lock:  # After any rebuild in progress, which may have read the old value
+                if self._catalog is not None:
+                    self._catalog = self._catalog.repriced(payload['question_id'], payload['value'])
+            return
+        self._generation += 1
+        self._built_at = 0
+
+
+question_catalog = QuestionCatalog()
+
+
+def question_changed(sender, **kwargs):
+    """post_save/post_delete/post_migrate handler: tell every process to rebuild."""
+    from .eventbus import get_event_bus
+
+    get_event_bus().publish('catalog', {})
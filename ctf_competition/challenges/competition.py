@@ -0,0 +1,154 @@
+"""
+Cached view of the competition timer.
+
+Every gated view used to run ``ChallengeTimer.objects.first()`` and then call
+``is_active()``/``time_left()`` several times, each re-reading the clock. The
+timer only changes when an admin starts, pauses, resumes or resets it, so the
+row is loaded into an immutable TimerSnapshot and reused until then.
+
+``competition_state.invalidate()`` is called after every timer change in this
+process and from the event bus ``timer`` listener for changes made in other
+processes. Snapshots also expire after ``max_age`` seconds, which bounds how
+stale another worker can be even without a shared event bus.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import wraps
+
+from django.shortcuts import redirect
+from django.utils.timezone import now
+
+from .models import ChallengeTimer
+from .streams import run_detached
+
+INACTIVE = 'Inactive'
+NOT_STARTED = 'NotStarted'
+ACTIVE = 'Active'
+PAUSED = 'Paused'
+FINISHED = 'Finished'
+
+
+@dataclass(frozen=True)
+class TimerSnapshot:
+    start_time: datetime = None
+    duration: timedelta = None
+    version: int = 0
+
+    @property
+    def deadline(self):
+        if self.start_time is None or self.duration is None:
+            return None
+        return self.start_time + self.duration
+
+    def state(self, at=None):
+        """Competition state at ``at`` (default: now), without touching the database."""
+        if self.duration is None:
+            return INACTIVE
+        if self.start_time is None:
+            return PAUSED
+        at = at or now()
+        if at < self.start_time:
+            return NOT_STARTED
+        if at < self.deadline:
+            return ACTIVE
+        return FINISHED
+
+    def remaining(self, at=None):
+        """Time left on the clock, frozen while paused; None without a timer."""
+        if self.duration is None:
+            return None
+        if self.start_time is None:
+            return self.duration
+        return max(self.deadline - (at or now()), timedelta(0))
+
+
+def epoch_ms(value):
+    return int(value.timestamp() * 1000) if value is not None else None
+
+
+def timer_payload(snapshot):
+    """
+    What clients need to run the countdown themselves: the state, the
+    absolute deadline while running, and the frozen remaining time otherwise.
+    """
+    state = snapshot.state()
+    running = state in (ACTIVE, NOT_STARTED)
+    remaining = None if running else snapshot.remaining()
+    return {
+        'state': state,
+        'deadline': epoch_ms(snapshot.deadline) if running else None,
+        'remaining': int(remaining.total_seconds() * 1000) if remaining is not None else None,
+        'version': snapshot.version,
+    }
+
+
+class CompetitionState:
+    max_age = 2  # Seconds before a snapshot is re-read from the database
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._loaded_at = 0
+        self._version = 0
+
+    def snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._loaded_at < self.max_age:
+            return snapshot
+        with self._lock:
+            if self._snapshot is snapshot:
+                self._snapshot = self._load(snapshot)
+                self._loaded_at = time.monotonic()
+            return self._snapshot
+
+    async def asnapshot(self):
+        """``snapshot()`` for streams: reloads on a shared executor thread, never the request's."""
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._loaded_at < self.max_age:
+            return snapshot
+        return await run_detached(self.snapshot)
+
+    def _load(self, previous):
+        timer = ChallengeTimer.objects.only('start_time', 'duration').first()
+        start_time = timer.start_time if timer else None
+        duration = timer.duration if timer else None
+        if previous is not None and (previous.start_time, previous.duration) == (start_time, duration):
+            return previous
+        self._version += 1
+        return TimerSnapshot(start_time, duration, self._version)
+
+    def invalidate(self, payload=None):
+        """Force the next ``snapshot()`` to reload. Usable as an event bus listener."""
+        self._loaded_at = 0
+
+
+competition_state = CompetitionState()
+
+
+def competition_required(view=None, *, staff_bypass=True):
+    """
+    Redirect players away from ``view`` unless the competition is running.
+
+    Staff and superusers are let through when ``staff_bypass`` is true. The
+    current snapshot is available to the view as ``request.competition``.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapped(request, *args, **kwargs):
+            snapshot = competition_state.snapshot()
+            request.competition = snapshot
+            user = request.user
+            if not (staff_bypass and (user.is_staff or user.is_superuser)):
+                state = snapshot.state()
+                if state == FINISHED:
+                    return redirect('finished_page')
+                if state != ACTIVE:
+                    return redirect('not_started_page')
+            return view_func(request, *args, **kwargs)
+        return wrapped
+
+    if view is not None:
+        return decorator(view)
+    return decorator
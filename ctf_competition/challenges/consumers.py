@@ -0,0 +1,47 @@
+"""
+WebSocket transport for the live channel (requires channels).
+
+Clients connect to ``/ws/live/?topics=scores,submissions,timer`` and receive
+one JSON message per event: ``{"event": ..., "id": ..., "data": ...}``, with
+the same events and payloads as the ``live_stream`` SSE endpoint.
+"""
+import asyncio
+from contextlib import aclosing
+from urllib.parse import parse_qs
+
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+from .live import LiveSubscription, parse_streams
+from .metrics import SSE_CONNECTIONS
+
+
+class LiveConsumer(AsyncWebsocketConsumer):
+    pump = None
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not (user.is_staff or user.is_superuser):
+            await self.close(code=4403)
+            return
+        query = parse_qs(self.scope['query_string'].decode())
+        try:
+            streams = parse_streams(query.get('topics', [''])[0])
+            last_event_id = int(query['last_event_id'][0]) if 'last_event_id' in query else None
+        except ValueError:
+            await self.close(code=4400)
+            return
+        await self.accept()
+        SSE_CONNECTIONS.labels('live-websocket').inc()
+        self.pump = asyncio.create_task(self.forward(LiveSubscription(streams, last_event_id)))
+
+    async def forward(self, subscription):
+        # Cancelling the pump then closes the subscription at once, as live.sse_events does
+        async with aclosing(subscription.events()) as events:
+            async for event, body, event_id in events:
+                if event is not None:  # WebSocket pings keep the connection alive instead
+                    await self.send(text_data=f'{{"event":"{event}","id":{event_id or "null"},"data":{body}}}')
+
+    async def disconnect(self, code):
+        if self.pump is not None:
+            self.pump.cancel()
+            SSE_CONNECTIONS.labels('live-websocket').dec()
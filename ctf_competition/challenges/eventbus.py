@@ -0,0 +1,172 @@
+"""
+Pluggable event bus for live submission, score and timer events.
+
+Views publish events with ``get_event_bus().publish(topic, payload)``. Each
+process keeps one EventRing per topic that SSE streams read from, and code
+that needs to react to events (the leaderboard, the scoreboard publisher)
+registers a listener with ``subscribe``. The backend decides how an event
+published in one process reaches the rings and listeners of the others:
+
+* ``InProcessEventBus`` delivers directly. Only correct with a single worker.
+* ``DatabaseEventBus`` appends events to the LiveEvent table and every
+  process tails it, so any number of daphne/gunicorn workers sharing the
+  database see every event. No extra service is needed.
+
+The backend is chosen with the ``CHALLENGES_EVENT_BUS`` setting.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils.module_loading import import_string
+from django.utils.timezone import now
+
+from .events import EventRing
+
+logger = logging.getLogger(__name__)
+
+TOPICS = ('submission', 'score', 'timer', 'catalog')
+
+
+class BaseEventBus:
+    def __init__(self, capacity=1000):
+        self.rings = {topic: EventRing(capacity) for topic in TOPICS}
+        self._listeners = defaultdict(list)
+
+    def publish(self, topic, payload):
+        """Publish ``payload`` on ``topic`` once the current transaction commits."""
+        if topic not in self.rings:
+            raise ValueError(f"Unknown event topic: {topic}")
+        transaction.on_commit(lambda: self._send(topic, payload))
+
+    def subscribe(self, topic, callback):
+        """Call ``callback(payload)`` for every event on ``topic``, from any process."""
+        self._listeners[topic].append(callback)
+
+    def ring(self, topic):
+        """Return this process's EventRing for ``topic``."""
+        self.start()
+        return self.rings[topic]
+
+    def start(self):
+        """Start any background delivery machinery. Safe to call repeatedly."""
+
+    def _send(self, topic, payload):
+        raise NotImplementedError
+
+    def _deliver(self, topic, payload, event_id=None):
+        # Listeners run first so caches are already invalidated when streams wake up.
+        for callback in self._listeners[topic]:
+            try:
+                callback(payload)
+            except Exception:
+                logger.exception("Event listener %r failed for %s event", callback, topic)
+        self.rings[topic].publish(payload, event_id)
+
+
+class InProcessEventBus(BaseEventBus):
+    def _send(self, topic, payload):
+        self._deliver(topic, payload)
+
+
+class DatabaseEventBus(BaseEventBus):
+    """
+    Tails the LiveEvent table from a daemon thread in every process.
+
+    Ids are allocated before commit, so a row can become visible after a row
+    with a higher id. The tailer therefore stops at a hole in the id sequence
+    and waits up to ``gap_timeout`` seconds for it to fill before assuming the
+    insert was rolled back. Event ids in the rings are the table ids, so an
+    SSE client can reconnect to any worker and resume with Last-Event-ID.
+    """
+
+    def __init__(self, capacity=1000, poll_interval=0.25, gap_timeout=2, retention=600):
+        super().__init__(capacity)
+        self.capacity = capacity
+        self.poll_interval = poll_interval
+        self.gap_timeout = timedelta(seconds=gap_timeout)
+        self.retention = timedelta(seconds=retention)
+        self.cursor = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def publish(self, topic, payload):
+        self.start()
+        super().publish(topic, payload)
+
+    def _send(self, topic, payload):
+        from .models import LiveEvent
+        LiveEvent.objects.create(topic=topic, payload=payload)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='event-bus-tail', daemon=True)
+                self._thread.start()
+
+    def _backfill(self):
+        """Load the most recent events so reconnecting clients can resume."""
+        from .models import LiveEvent
+        for topic in TOPICS:
+            recent = LiveEvent.objects.filter(topic=topic).order_by('-id').values_list('id', 'payload')
+            for event_id, payload in reversed(recent[:self.capacity]):
+                self.rings[topic].publish(payload, event_id)
+        self.cursor = LiveEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+    def poll(self):
+        """Deliver every newly committed event. Returns the number delivered."""
+        from .models import LiveEvent
+        rows = LiveEvent.objects.filter(id__gt=self.cursor).order_by('id').values_list(
+            'id', 'topic', 'payload', 'created'
+        )[:500]
+        delivered = 0
+        for event_id, topic, payload, created in rows:
+            if event_id != self.cursor + 1 and now() - created < self.gap_timeout:
+                break  # An earlier insert may still be committing
+            self.cursor = event_id
+            if topic in self.rings:
+                self._deliver(topic, payload, event_id)
+            delivered += 1
+        return delivered
+
+    def purge(self):
+        from .models import LiveEvent
+        LiveEvent.objects.filter(created__lt=now() - self.retention).delete()
+
+    def _run(self):
+        last_purge = 0
+        while True:
+            try:
+                if self.cursor is None:
+                    self._backfill()
+                if not self.poll():
+                    time.sleep(self.poll_interval)
+                if time.monotonic() - last_purge > self.retention.total_seconds() / 10:
+                    self.purge()
+                    last_purge = time.monotonic()
+            except Exception:
+                logger.exception("Event bus tail failed, retrying")
+                close_old_connections()
+                time.sleep(self.poll_interval * 4)
+
+
+_event_bus = None
+_event_bus_lock = threading.Lock()
+
+
+def get_event_bus():
+    """Return the process-wide event bus configured by ``CHALLENGES_EVENT_BUS``."""
+    global _event_bus
+    if _event_bus is None:
+        with _event_bus_lock:
+            if _event_bus is None:
+                config = getattr(settings, 'CHALLENGES_EVENT_BUS', {})
+                backend = import_string(config.get('BACKEND', 'challenges.eventbus.InProcessEventBus'))
+                _event_bus = backend(**config.get('OPTIONS', {}))
+    return _event_bus
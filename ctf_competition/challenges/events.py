@@ -0,0 +1,74 @@
+import threading
+from collections import deque
+
+
+def parse_last_event_id(request):
+    """Return the integer SSE ``Last-Event-ID`` sent by a reconnecting client, if any."""
+    value = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+class EventRing:
+    """
+    Bounded multi-subscriber broadcast buffer.
+
+    Every published event gets a monotonically increasing id and is kept until
+    ``capacity`` newer events push it out. Subscribers never remove anything:
+    each one tracks its own cursor, so every open stream sees every event, and
+    a reconnecting client can resume from the id it last saw (SSE
+    ``Last-Event-ID``). A subscriber whose cursor has already been overwritten
+    is sent a ``lagged`` event instead of the buffer growing to wait for it.
+    """
+
+    def __init__(self, capacity=1000):
+        self._events = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._waiters = set()
+        self.last_id = 0
+        self.evicted_id = 0  # Id of the newest event that has been overwritten
+
+    def __len__(self):
+        return len(self._events)
+
+    @property
+    def waiting(self):
+        """Number of streams currently blocked in ``wait``."""
+        return len(self._waiters)
+
+    def publish(self, data, event_id=None):
+        """Append an event and wake every subscriber. Safe to call from any thread."""
+        with self._lock:
+            self.last_id = event_id if event_id is not None else self.last_id + 1
+            if len(self._events) == self._events.maxlen:
+                self.evicted_id = self._events[0][0]
+            self._events.append((self.last_id, data))
+            waiters = list(self._waiters)
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(waiter.set)
+        return self.last_id
+
+    def read(self, cursor):
+        """
+        Return ``(lagged, events)`` for everything published after ``cursor``.
+        ``lagged`` is true when some of those events were already overwritten.
+        """
+        with self._lock:
+            events = []
+            for event_id, data in reversed(self._events):
+                if event_id <= cursor:
+                    break
+                events.append((event_id, data))
+            events.reverse()
+            return cursor < self.evicted_id, events
+
+    def add_waiter(self, loop, event):
+        """Have ``publish`` set the asyncio ``event`` (running on ``loop``) from any thread."""
+        with self._lock:
+            self._waiters.add((loop, event))
+
+    def remove_waiter(self, loop, event):
+        with self._lock:
+            self._waiters.discard((loop, event))
@@ -0,0 +1,138 @@
+"""
+Streaming export of submissions for post-event analysis.
+
+Rows are read in keyset-paginated chunks (``id > last_id ORDER BY id
+LIMIT n``) rather than with ``QuerySet.iterator()``: mysqlclient buffers the
+whole result set client-side even for iterator(), so only bounded queries
+keep memory flat for millions of rows on every backend. Each chunk is
+encoded and, optionally, gzip-compressed before the next one is read.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, time
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.timezone import is_naive, make_aware
+
+from .models import Submission
+
+FIELDS = (
+    ('id', 'id'),
+    ('user_id', 'user_id'),
+    ('username', 'user__username'),
+    ('question_id', 'question_id'),
+    ('question', 'question__title'),
+    ('category', 'question__category'),
+    ('submitted_answer', 'submitted_answer'),
+    ('is_correct', 'is_correct'),
+    ('timestamp', 'timestamp'),
+)
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+CHUNK_SIZE = 2000
+
+
+def parse_filters(since=None, until=None, category=None, user=None):
+    """
+    Turn raw filter strings into Submission lookups. ``since``/``until`` take
+    an ISO date or datetime (a bare ``until`` date includes that whole day),
+    ``user`` a username. Raises ValueError for unparseable dates.
+    """
+    filters = {}
+    for name, value, lookup in (('since', since, 'timestamp__gte'), ('until', until, 'timestamp__lte')):
+        if not value:
+            continue
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError(f"Invalid {name} date: {value!r}")
+            moment = datetime.combine(day, time.max if name == 'until' else time.min)
+        filters[lookup] = make_aware(moment) if is_naive(moment) else moment
+    if category:
+        filters['question__category'] = category
+    if user:
+        filters['user__username'] = user
+    return filters
+
+
+def submission_chunks(filters, chunk_size=CHUNK_SIZE):
+    """Yield lists of export rows, ``chunk_size`` at a time, in id order."""
+    queryset = Submission.objects.filter(**filters).order_by('id').values_list(*(lookup for _, lookup in FIELDS))
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id)[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def encode_csv(chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in FIELDS])
+    for rows in chunks:
+        writer.writerows((*row[:-1], row[-1].isoformat()) for row in rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()  # Header only: no rows matched
+
+
+def encode_ndjson(chunks):
+    names = [name for name, _ in FIELDS]
+    for rows in chunks:
+        yield ''.join(
+            json.dumps(dict(zip(names, (*row[:-1], row[-1].isoformat())))) + '\n' for row in rows
+        ).encode()
+
+
+ENCODERS = {'csv': encode_csv, 'ndjson': encode_ndjson}
+
+
+def gzip_stream(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_stream(format, filters, compress=False):
+    """Bytes of the whole export, produced chunk by chunk."""
+    stream = ENCODERS[format](submission_chunks(filters))
+    return gzip_stream(stream) if compress else stream
+
+
+async def _aiterate(iterator):
+    sentinel = object()
+    while (chunk := await sync_to_async(next)(iterator, sentinel)) is not sentinel:
+        yield chunk
+
+
+def export_response(request, format, filters, compress=False):
+    """
+    A streaming download of the export. Under ASGI the chunks are pulled
+    through sync_to_async one at a time, since Django would otherwise read a
+    synchronous iterator into a list before sending any of it.
+    """
+    content_type, extension = FORMATS[format]
+    stream = export_stream(format, filters, compress)
+    if isinstance(request, ASGIRequest):
+        stream = _aiterate(stream)
+    filename = f'submissions.{extension}'
+    if compress:
+        content_type, filename = 'application/gzip', filename + '.gz'
+    response = StreamingHttpResponse(stream, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
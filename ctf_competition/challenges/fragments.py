@@ -0,0 +1,101 @@
+"""
+Pre-rendered question markup.
+
+A question's description, its answer inputs and its card on the category
+page only change when an admin edits the question, yet they used to go
+through the template engine on every page view. ``FragmentCache`` keeps the
+rendered HTML together with the fields it was rendered from, and re-renders
+only when those fields differ. Per-player state (attempts left, solved) and
+the CSRF form stay in the page templates, layered around the fragments by
+QuestionProgress.
+
+Saving or deleting a Question evicts its fragments in this process right
+away. Other processes notice the changed fields on their next render, so a
+fragment is never served for content it was not rendered from. Entries are
+dropped least recently used first once they take more than ``budget``
+characters.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.template.loader import render_to_string
+
+
+class FragmentCache:
+    def __init__(self, budget):
+        self.budget = budget
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # (question_id, part) -> (source, html, cost)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, source, render):
+        """
+        The HTML cached under ``key`` if it was rendered from ``source`` (a
+        tuple of the fields it shows), otherwise ``render()``, cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == source:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        html = render()
+        cost = len(html) + sum(len(field) for field in source if isinstance(field, str))
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[2]
+            self._entries[key] = (source, html, cost)
+            self.size += cost
+            while self.size > self.budget and len(self._entries) > 1:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+        return html
+
+    def evict(self, question_id):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == question_id]:
+                self.size -= self._entries.pop(key)[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def question_changed(self, sender, instance, **kwargs):
+        """post_save/post_delete handler for Question."""
+        self.evict(instance.pk)
+
+
+question_fragments = FragmentCache(getattr(settings, 'CHALLENGES_FRAGMENT_CACHE_SIZE', 4 * 2 ** 20))
+
+
+def description(question):
+    return question_fragments.get(
+        (question.id, 'description'), (question.description,),
+        lambda: render_to_string('challenges/fragments/description.html', {'question': question}),
+    )
+
+
+def answer_inputs(question):
+    return question_fragments.get(
+        (question.id, 'inputs'),
+        (question.is_multiple_choice, question.option_1, question.option_2, question.option_3, question.option_4),
+        lambda: render_to_string('challenges/fragments/answer_inputs.html', {'question': question}),
+    )
+
+
+def card(question, status):
+    """The question's card on the category page, for one of the progress statuses."""
+    return question_fragments.get(
+        (question.id, status), (question.title, question.value),
+        lambda: render_to_string('challenges/fragments/question_card.html', {'question': question, 'status': status}),
+    )
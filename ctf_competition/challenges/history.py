@@ -0,0 +1,180 @@
+"""
+In-memory score history for progression graphs.
+
+Each player's history is a pair of parallel ``array`` columns (epoch seconds
+and score, 8 bytes a point) holding a point for every change of their
+PlayerScore; changes less than ``resolution`` seconds after the previous
+point replace it, which bounds the cost of bursts of repricing. The store is
+replayed from the solves on first use, including the repricing of dynamic
+questions, and then appended to by the event bus: a ``score`` event adds a
+point for that player, and a rescore of one question adds a point for each of
+its solvers, from the totals the event carries. Rescores of everything (``repair``) drop the store so it is
+replayed on next use, as the leaderboard index is.
+
+``sample`` reads every series at the same evenly spaced instants, so a graph
+of any number of players over any window costs a fixed number of values per
+player, however many times their score changed.
+"""
+import math
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from datetime import datetime
+
+from .models import Question, Submission
+from .scoring import question_value
+
+
+class ScoreHistory:
+    resolution = 30  # Seconds within which successive changes share one point
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._series = {}  # user_id -> (times, scores)
+        self._loaded = False
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._replay()
+            self._loaded = True
+
+    def _replay(self):
+        """Rebuild every series by replaying the solves in order, as record_submission and reprice applied them."""
+        questions = {
+            row[0]: row[1:]
+            for row in Question.objects.values_list('id', 'points', 'dynamic_scoring', 'minimum_points', 'decay')
+        }
+        solves = Submission.objects.filter(first_solve=True).order_by('timestamp', 'id').values_list(
+            'user_id', 'question_id', 'timestamp', 'user__is_staff', 'user__is_superuser',
+        )
+        totals, solvers, values, staff = {}, {}, {}, set()
+        for user_id, question_id, timestamp, is_staff, is_superuser in solves.iterator():
+            if is_staff or is_superuser:
+                staff.add(user_id)
+            moment = timestamp.timestamp()
+            points, dynamic, minimum, decay = questions[question_id]
+            award = values.get(question_id, points)
+            totals[user_id] = totals.get(user_id, 0) + award
+            if user_id not in staff:
+                self._append(user_id, moment, totals[user_id])
+            if not dynamic:
+                continue
+            holders = solvers.setdefault(question_id, [])
+            holders.append(user_id)
+            value = question_value(points, minimum, decay, len(holders))
+            if value != award:
+                values[question_id] = value
+                for holder in holders:
+                    totals[holder] += value - award
+                    if holder not in staff:
+                        self._append(holder, moment, totals[holder])
+
+    def _append(self, user_id, moment, score):
+        series = self._series.get(user_id)
+        if series is None:
+            series = self._series[user_id] = (array('I'), array('i'))
+        times, scores = series
+        moment = int(moment)
+        if not times or moment >= times[-1] + max(self.resolution, 1):
+            if not scores or scores[-1] != score:
+                times.append(moment)
+                scores.append(score)
+        elif moment >= times[-1]:
+            scores[-1] = score
+        else:
+            # Events from other processes can arrive slightly out of order
+            position = bisect_right(times, moment)
+            times.insert(position, moment)
+            scores.insert(position, score)
+
+    def reset(self):
+        """Drop the store so it is replayed from the database on next use."""
+        with self._lock:
+            self._series = {}
+            self._loaded = False
+
+    def record_score(self, user_id, score, moment):
+        """Add a point to a player's series. ``moment`` is in epoch seconds."""
+        with self._lock:
+            if self._loaded:
+                self._append(user_id, moment, score)
+
+    def on_score_event(self, payload):
+        """Event bus listener for ``score`` events."""
+        if 'joined' in payload:
+            return  # New players start at zero, which every series already reads before its first point
+        if payload.get('rescored'):
+            if payload.get('question_id') is None:
+                self.reset()
+            else:
+                moment = time.time()
+                with self._lock:
+                    for user_id, score in payload['scores']:
+                        self.record_score(user_id, score, moment)
+        elif not payload['is_staff']:
+            self.record_score(
+                payload['user_id'], payload['score'], datetime.fromisoformat(payload['solved_at']).timestamp(),
+            )
+
+    def span(self):
+        """``(first, last)`` epoch seconds of any recorded point, or None if there are none."""
+        self._ensure_loaded()
+        with self._lock:
+            moments = [times[0] for times, _ in self._series.values() if times]
+            if not moments:
+                return None
+            return min(moments), max(times[-1] for times, _ in self._series.values() if times)
+
+    def sample(self, user_ids, since, until, count=200):
+        """
+        Return ``(instants, {user_id: scores})``: ``count`` evenly spaced
+        epoch-second instants from ``since`` to ``until``, and each player's
+        score at every one of them.
+        """
+        count = max(count, 2)
+        step = (until - since) / (count - 1)
+        instants = [since + index * step for index in range(count)]
+        self._ensure_loaded()
+        result = {}
+        with self._lock:
+            for user_id in user_ids:
+                times, scores = self._series.get(user_id, ((), ()))
+                start = bisect_right(times, since)
+                stop = bisect_right(times, until)
+                value = scores[start - 1] if start else 0
+                sampled = []
+                if step and stop - start < count:
+                    # Fewer changes than samples: fill the runs between changes
+                    filled = 0
+                    for moment, score in zip(times[start:stop], scores[start:stop]):
+                        index = math.ceil((moment - since) / step)
+                        if index > filled:
+                            sampled += [value] * (index - filled)
+                            filled = index
+                        value = score
+                    sampled += [value] * (count - filled)
+                    del sampled[count:]
+                else:
+                    position = start
+                    for instant in instants:
+                        position = bisect_right(times, instant, position, stop)
+                        sampled.append(scores[position - 1] if position else 0)
+                result[user_id] = sampled
+        return instants, result
+
+    def memory(self):
+        """Bytes held by the series columns."""
+        with self._lock:
+            return sum(len(times) * times.itemsize + len(scores) * scores.itemsize for times, scores in self._series.values())
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._series)
+
+
+score_history = ScoreHistory()
@@ -0,0 +1,269 @@
+import math
+import os
+import random
+import threading
+from datetime import datetime
+
+from django.db.models import Max, Q
+
+from .models import PlayerScore
+
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, levels):
+        self.key = key
+        self.next = [None] * levels
+        self.width = [1] * levels
+
+
+class IndexableSkipList:
+    """
+    Sorted container with O(log n) insert, remove, lookup by position and
+    position-of-key. Each link records how many elements it skips, which is
+    what makes rank queries logarithmic.
+    """
+
+    max_levels = 24  # Enough for ~16 million entries
+
+    def __init__(self):
+        self.head = _Node(None, self.max_levels)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def _find_chain(self, key):
+        chain = [None] * self.max_levels
+        steps = [0] * self.max_levels
+        node = self.head
+        for level in reversed(range(self.max_levels)):
+            while node.next[level] is not None and node.next[level].key < key:
+                steps[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+        return chain, steps
+
+    def insert(self, key):
+        chain, steps_at_level = self._find_chain(key)
+        levels = min(self.max_levels, 1 - int(math.log(1.0 - random.random(), 2.0)))
+        node = _Node(key, levels)
+        steps = 0
+        for level in range(levels):
+            previous = chain[level]
+            node.next[level] = previous.next[level]
+            previous.next[level] = node
+            node.width[level] = previous.width[level] - steps
+            previous.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(levels, self.max_levels):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, key):
+        chain, _ = self._find_chain(key)
+        node = chain[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        for level in range(len(node.next)):
+            previous = chain[level]
+            previous.width[level] += node.width[level] - 1
+            previous.next[level] = node.next[level]
+        for level in range(len(node.next), self.max_levels):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+    def index(self, key):
+        """Return the 0-based position of ``key``."""
+        chain, steps = self._find_chain(key)
+        node = chain[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        return sum(steps)
+
+    def slice(self, start, stop):
+        """Return the keys at positions ``start`` to ``stop - 1``."""
+        start = max(start, 0)
+        stop = min(stop, self.size)
+        if start >= stop:
+            return []
+        node = self.head
+        remaining = start + 1
+        for level in reversed(range(self.max_levels)):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        keys = []
+        while node is not None and len(keys) < stop - start:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+class Leaderboard:
+    """
+    In-memory ranking of players, kept in step with PlayerScore.
+
+    Players are ordered by score, then by the time of their last correct
+    submission (earlier wins), then by user id. The index is loaded from the
+    database on first use and updated incrementally by ``record_score``,
+    ``rescore`` and ``add_players``; new players are ranked at zero points
+    as soon as their PlayerScore row is created.
+
+    ``version`` goes up on every change, loaded or not, and ``epoch`` is
+    random per process, so together they identify the ranking this process
+    would serve without reading it.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._index = IndexableSkipList()
+        self._entries = {}  # user_id -> (key, username)
+        self._loaded = False
+        self.epoch = os.urandom(4).hex()
+        self.version = 0
+
+    @staticmethod
+    def _key(user_id, score, last_solve):
+        solved_at = last_solve.timestamp() if last_solve else math.inf
+        return (-score, solved_at, user_id)
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            rows = PlayerScore.objects.filter(
+                user__is_staff=False, user__is_superuser=False
+            ).annotate(
+                last_solve=Max('user__submission__timestamp', filter=Q(user__submission__is_correct=True))
+            ).values_list('user_id', 'user__username', 'score', 'last_solve')
+            for user_id, username, score, last_solve in rows.iterator():
+                self._set(user_id, username, score, last_solve)
+            self._loaded = True
+
+    def _set(self, user_id, username, score, last_solve):
+        previous = self._entries.get(user_id)
+        if previous is not None:
+            self._index.remove(previous[0])
+        key = self._key(user_id, score, last_solve)
+        self._index.insert(key)
+        self._entries[user_id] = (key, username)
+
+    def reset(self):
+        """Drop the index so it is reloaded from the database on next use."""
+        with self._lock:
+            self._index = IndexableSkipList()
+            self._entries = {}
+            self._loaded = False
+            self.version += 1
+
+    def record_score(self, user_id, username, score, last_solve):
+        """Move a player to their new position after a score change."""
+        with self._lock:
+            if self._loaded:
+                self._set(user_id, username, score, last_solve)
+            self.version += 1
+
+    def rescore(self, scores):
+        """
+        Move players whose totals changed together, such as a question's
+        solvers after a reprice. ``scores`` holds ``(user_id, score)`` pairs;
+        each player keeps their last-solve tie-break.
+        """
+        with self._lock:
+            if self._loaded:
+                for user_id, score in scores:
+                    entry = self._entries.get(user_id)
+                    if entry is None:
+                        continue  # Not ranked here yet; their own score event follows
+                    key, username = entry
+                    self._index.remove(key)
+                    key = (-score, key[1], user_id)
+                    self._index.insert(key)
+                    self._entries[user_id] = (key, username)
+            self.version += 1
+
+    def add_players(self, players):
+        """Rank new players, ``(user_id, username)`` pairs, at zero points."""
+        with self._lock:
+            if self._loaded:
+                for user_id, username in players:
+                    if user_id not in self._entries:
+                        self._set(user_id, username, 0, None)
+            self.version += 1
+
+    def on_score_event(self, payload):
+        """Event bus listener for ``score`` events."""
+        if 'joined' in payload:
+            self.add_players(payload['joined'])
+        elif payload.get('rescored'):
+            if payload.get('question_id') is None:
+                self.reset()  # Anyone's total may have changed; reload on next use
+            else:
+                self.rescore(payload['scores'])
+        elif not payload['is_staff']:
+            self.record_score(
+                payload['user_id'], payload['username'], payload['score'],
+                datetime.fromisoformat(payload['solved_at']),
+            )
+
+    def _row(self, key, position):
+        username = self._entries[key[2]][1]
+        return {'rank': position + 1, 'user_id': key[2], 'username': username, 'score': -key[0]}
+
+    def top(self, n):
+        self._ensure_loaded()
+        with self._lock:
+            return [self._row(key, i) for i, key in enumerate(self._index.slice(0, n))]
+
+    def standings(self, n):
+        """Return ``(version, rows)`` for the top ``n``, read together so the rows match the version."""
+        self._ensure_loaded()
+        with self._lock:
+            return self.version, [self._row(key, i) for i, key in enumerate(self._index.slice(0, n))]
+
+    def rank(self, user_id):
+        """Return the 1-based rank of ``user_id``, or None if they have no score."""
+        self._ensure_loaded()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            return self._index.index(entry[0]) + 1
+
+    def around(self, user_id, radius=2):
+        """Return the rows within ``radius`` places of ``user_id``."""
+        self._ensure_loaded()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return []
+            position = self._index.index(entry[0])
+            start = max(position - radius, 0)
+            keys = self._index.slice(start, position + radius + 1)
+            return [self._row(key, start + i) for i, key in enumerate(keys)]
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._index)
+
+
+leaderboard = Leaderboard()
+
+
+def publish_joined(players):
+    """Tell every process about new non-staff players, ``(user_id, username)`` pairs, on commit."""
+    from .eventbus import get_event_bus
+
+    if players:
+        get_event_bus().publish('score', {'joined': [[user_id, username] for user_id, username in players]})
+
+
+def player_score_created(sender, instance, created, raw=False, **kwargs):
+    """post_save handler for PlayerScore. Bulk creation skips it and calls publish_joined itself."""
+    user = instance.user
+    if created and not raw and not (user.is_staff or user.is_superuser):
+        publish_joined([(user.pk, user.username)])
@@ -0,0 +1,136 @@
+"""
+One live connection per dashboard.
+
+The admin screens used to hold a separate SSE stream for the scoreboard,
+the submission feed and the timer. Each stream ran its own server loop and
+used one of the browser's few connections per host. A LiveSubscription
+serves any combination of these streams over one connection. It registers
+a single asyncio.Event with every source it follows (the submission and
+timer event rings, the scoreboard publisher) and yields named events as
+each source advances. ``live_stream`` sends them as SSE events, and
+``challenges.consumers.LiveConsumer`` sends them over a WebSocket when
+channels is installed. The older single-stream endpoints
+(``scoreboard_stream``, ``timer_stream``, ``submission_stream``) are a
+subscription to one stream whose events go out unnamed, as they always did.
+
+Submission events carry their ring id, so a reconnecting SSE client resumes
+the feed from ``Last-Event-ID``. Scores and timer state are sent in full on
+every new connection.
+"""
+import asyncio
+import json
+from contextlib import aclosing
+
+from django.utils.timezone import now
+
+from .competition import ACTIVE, competition_state, epoch_ms, timer_payload
+from .eventbus import get_event_bus
+from .scoreboard import encode_json, publisher
+
+STREAMS = ('scores', 'submissions', 'timer')
+KEEPALIVE_SECONDS = 15
+
+
+def parse_streams(value):
+    """Streams named in a comma-separated ``topics`` parameter, or all of them when it is empty."""
+    streams = [name.strip() for name in (value or '').split(',') if name.strip()]
+    unknown = set(streams) - set(STREAMS)
+    if unknown:
+        raise ValueError(f"Unknown topics: {', '.join(sorted(unknown))}. Choose from {', '.join(STREAMS)}.")
+    return streams or list(STREAMS)
+
+
+class LiveSubscription:
+    def __init__(self, streams, last_event_id=None):
+        self.streams = streams
+        self.last_event_id = last_event_id
+
+    async def events(self):
+        """
+        Yield ``(event, body, event_id)`` until the consumer stops iterating:
+        ``body`` is the JSON text of the event, ``event_id`` is set for
+        submission events only, and ``(None, None, None)`` is a keepalive.
+        """
+        loop, wakeup = asyncio.get_running_loop(), asyncio.Event()
+        bus = get_event_bus()
+        submissions = bus.ring('submission') if 'submissions' in self.streams else None
+        timer = bus.ring('timer') if 'timer' in self.streams else None
+        scores = 'scores' in self.streams
+
+        cursor = submissions.last_id if submissions else 0
+        if self.last_event_id is not None and self.last_event_id <= cursor:
+            cursor = self.last_event_id  # Ids from before a restart are ignored
+        version, last_timer = 0, None
+
+        for ring in (submissions, timer):
+            if ring is not None:
+                ring.add_waiter(loop, wakeup)
+        if scores:
+            publisher.attach(wakeup)
+        try:
+            if scores:
+                # Per-connection clock reading so the client can count down to the deadline
+                yield 'clock', encode_json({'server_time': epoch_ms(now())}), None
+            while True:
+                wakeup.clear()
+                sent = False
+                timeout = KEEPALIVE_SECONDS
+
+                if scores and publisher.version != version and publisher.snapshot_body is not None:
+                    body = publisher.body_for(version)
+                    version = publisher.version  # Read before yielding: the version may move while we wait
+                    yield 'scores', body, None
+                    sent = True
+
+                if submissions is not None:
+                    lagged, events = submissions.read(cursor)
+                    if lagged:
+                        resumed = events[0][0] if events else submissions.last_id
+                        yield 'lagged', encode_json({'resumed_from': resumed}), None
+                    for event_id, data in events:
+                        yield 'submissions', json.dumps(data), event_id
+                    if events:
+                        cursor = events[-1][0]
+                        sent = True
+
+                if timer is not None:
+                    snapshot = await competition_state.asnapshot()
+                    data = timer_payload(snapshot)
+                    if data != last_timer:
+                        last_timer = data
+                        yield 'timer', encode_json({**data, 'server_time': epoch_ms(now())}), None
+                        sent = True
+                    if data['state'] == ACTIVE:
+                        # Wake at the deadline to announce the finish
+                        timeout = min(timeout, max(snapshot.remaining().total_seconds(), 0) + 0.5)
+
+                if sent:
+                    continue
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    yield None, None, None
+        finally:
+            for ring in (submissions, timer):
+                if ring is not None:
+                    ring.remove_waiter(loop, wakeup)
+            if scores:
+                publisher.detach(wakeup)
+
+
+async def sse_events(subscription, unnamed=()):
+    """
+    Encode a subscription's events as SSE frames. Events listed in
+    ``unnamed`` are sent as plain messages, without an ``event:`` line.
+    """
+    # Closing this generator closes the subscription too, releasing its waiters without waiting for GC
+    async with aclosing(subscription.events()) as events:
+        async for event, body, event_id in events:
+            if event is None:
+                yield b": keepalive\n\n"
+                continue
+            lines = [] if event_id is None else [f"id: {event_id}"]
+            if event not in unnamed:
+                lines.append(f"event: {event}")
+            lines.append(f"data: {body}")
+            yield ("\n".join(lines) + "\n\n").encode()
@@ -0,0 +1,61 @@
+import random
+import string
+
+from django.core.management.base import BaseCommand
+
+from challenges.answers import AnswerMatcher, answer_matchers
+from challenges.benchmarking import best_of, format_table, throwaway_database
+from challenges.models import Question
+
+
+def random_flag(length=24):
+    return ''.join(random.choices(string.ascii_letters + string.digits, k=length))
+
+
+class Command(BaseCommand):
+    help = "Measure answer checks per second, old inline comparison vs compiled matchers (throwaway database)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checks', type=int, default=10_000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        checks, repeat = options['checks'], options['repeat']
+        flag = random_flag()
+        guesses = [random.choice([flag, f'  {flag.upper()} ', random_flag()]) for _ in range(checks)]
+
+        def legacy(answer):
+            return lambda: [guess.strip().lower() == answer.lower() for guess in guesses]
+
+        def compiled(matcher):
+            return lambda: [matcher.matches(guess) for guess in guesses]
+
+        rows = [
+            ('inline strip/lower', best_of(legacy(flag), repeat)),
+            ('matcher: normalized', best_of(compiled(AnswerMatcher(flag)), repeat)),
+            ('matcher: exact', best_of(compiled(AnswerMatcher(flag, answer_mode='exact')), repeat)),
+            ('matcher: 5 answers + CTF{}', best_of(compiled(AnswerMatcher(
+                flag, '\n'.join(random_flag() for _ in range(4)), flag_prefix='CTF',
+            )), repeat)),
+            ('matcher: regex', best_of(compiled(AnswerMatcher(
+                rf'(?i){flag[:8]}[a-z0-9]+', answer_mode='regex',
+            )), repeat)),
+        ]
+
+        # What submit_answer pays per request: fetching the answer vs the cached matcher
+        with throwaway_database():
+            question = Question.objects.create(title='Benchmark', description='', answer=flag)
+            answer_matchers.check(question.id, flag)
+            rows += [
+                ('inline, answer fetched per check', best_of(lambda: [
+                    guess.strip().lower() == Question.objects.only('answer').get(id=question.id).answer.lower()
+                    for guess in guesses
+                ], repeat=1)),
+                ('cached matcher per check', best_of(lambda: [
+                    answer_matchers.check(question.id, guess) for guess in guesses
+                ], repeat)),
+            ]
+
+        self.stdout.write(format_table(['approach', 'checks/s', 'us/check'], [
+            [name, f'{checks / seconds:,.0f}', f'{seconds / checks * 1e6:.2f}'] for name, seconds in rows
+        ]))
@@ -0,0 +1,261 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils.timezone import now
+
+from challenges import led_controller, ratelimit
+from challenges.benchmarking import create_players, format_table, percentile, throwaway_database
+from challenges.metrics import QueryTimer
+from challenges.models import ChallengeTimer, Question
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SSE_ENDPOINTS = ['scoreboard_stream', 'submissions_stream']
+SSE_CONNECT_TIMEOUT = 30  # Seconds to wait for every SSE client before the players start
+
+
+class EndpointStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.reasons = Counter()  # (endpoint, error) pairs, such as SQLite's "database is locked"
+
+    def record(self, name, seconds, queries, error=None):
+        with self.lock:
+            self.latencies[name].append(seconds)
+            self.queries[name] += queries
+            if error is not None:
+                self.errors[name] += 1
+                self.reasons[name, error] += 1
+
+    def report(self, elapsed):
+        endpoints = {}
+        for name, latencies in self.latencies.items():
+            latencies = sorted(latencies)
+            endpoints[name] = {
+                'requests': len(latencies),
+                'errors': self.errors[name],
+                'throughput_rps': round(len(latencies) / elapsed, 1),
+                'successful_rps': round((len(latencies) - self.errors[name]) / elapsed, 1),
+                'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+                'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+                'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+                'queries_per_request': round(self.queries[name] / len(latencies), 2),
+            }
+        return endpoints
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate a full competition: players browse and submit answers while SSE clients watch. "
+        "Writes a JSON report with throughput, latency percentiles, queries per request and peak memory. "
+        "Runs in a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=200)
+        parser.add_argument('--questions', type=int, default=40)
+        parser.add_argument('--rounds', type=int, default=5, help="Question views and submissions per player")
+        parser.add_argument('--concurrency', type=int, default=8, help="Threads driving players")
+        parser.add_argument('--sse-clients', type=int, default=10, help="Clients per SSE endpoint")
+        parser.add_argument('--accuracy', type=float, default=0.3, help="Chance that a submission is correct")
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--output', default='competition-benchmark.json')
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        # Never drive a real strip. Players all share the test client's address, as behind an onsite NAT
+        led_controller.led_worker.transport = led_controller.FakeTransport()
+        ratelimit._limiter = None
+
+        with throwaway_database(on_disk=True), override_settings(ALLOWED_HOSTS=['*']):
+            report = self.run(options)
+
+        report['config'] = {key: options[key] for key in (
+            'players', 'questions', 'rounds', 'concurrency', 'sse_clients', 'accuracy', 'seed',
+        )}
+        report['database'] = connection.vendor
+        report['peak_rss_mb'] = self.peak_rss_mb()
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2)
+
+        self.stdout.write(format_table(
+            ['endpoint', 'requests', 'req/s', 'errors', 'ok req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'queries'],
+            [
+                [name, e['requests'], e['throughput_rps'], e['errors'], e['successful_rps'], e['p50_ms'],
+                 e['p95_ms'], e['p99_ms'], e['queries_per_request']]
+                for name, e in report['endpoints'].items()
+            ],
+        ))
+        self.stdout.write(
+            f"{report['requests_per_second']} req/s overall, {report['successful_requests_per_second']} "
+            f"succeeded; {report['errors']} of {report['requests']} requests failed"
+        )
+        for failure in report['failures']:
+            self.stdout.write(f"  {failure['count']} x {failure['endpoint']}: {failure['error']}")
+        self.stdout.write(f"SSE frames received: {report['sse']['frames']}")
+        for error, count in report['sse']['errors'].items():
+            self.stdout.write(f"  {count} x SSE client failed: {error}")
+        self.stdout.write(f"Peak RSS: {report['peak_rss_mb']} MB. Report written to {options['output']}")
+
+    def run(self, options):
+        categories = [category for category, _ in Question.CATEGORY_CHOICES]
+        questions = Question.objects.bulk_create([
+            Question(
+                title=f'Question {i}', description='Benchmark question ' * 20, answer=f'flag{i}',
+                points=random.randrange(50, 500, 50), category=categories[i % len(categories)], max_attempts=3,
+            )
+            for i in range(options['questions'])
+        ])
+        if questions and questions[0].pk is None:
+            questions = list(Question.objects.order_by('id'))
+        by_category = defaultdict(list)
+        for question in questions:
+            by_category[question.category].append(question)
+
+        players = create_players(options['players'])
+        staff = User.objects.create(username='benchmark-staff', is_staff=True)
+        ChallengeTimer.objects.create(start_time=now(), duration=timedelta(hours=1))
+
+        stats = EndpointStats()
+        sse = {
+            'frames': dict.fromkeys(SSE_ENDPOINTS, 0),
+            'errors': Counter(),
+            'connected': threading.Event(),
+            'stop': threading.Event(),
+        }
+        sse_thread = threading.Thread(target=self.watch_streams, args=(staff, options['sse_clients'], sse))
+        sse_thread.start()
+        # Players start only once every stream is open, or the first events are never seen
+        if not sse['connected'].wait(SSE_CONNECT_TIMEOUT):
+            self.stderr.write(f"SSE clients still connecting after {SSE_CONNECT_TIMEOUT}s, starting anyway")
+
+        work = list(players)
+        work_lock = threading.Lock()
+
+        def next_player():
+            with work_lock:
+                return work.pop() if work else None
+
+        def drive():
+            while (player := next_player()) is not None:
+                self.play(player, by_category, options, stats)
+            connection.close()
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=drive) for _ in range(options['concurrency'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        time.sleep(1)  # Let the last events reach the SSE clients
+        sse['stop'].set()
+        sse_thread.join()
+
+        requests = sum(len(latencies) for latencies in stats.latencies.values())
+        errors = sum(stats.errors.values())
+        return {
+            'duration_s': round(elapsed, 2),
+            'requests': requests,
+            'errors': errors,
+            'requests_per_second': round(requests / elapsed, 1),
+            'successful_requests_per_second': round((requests - errors) / elapsed, 1),
+            'failures': [
+                {'endpoint': name, 'error': error, 'count': count}
+                for (name, error), count in stats.reasons.most_common()
+            ],
+            'endpoints': stats.report(elapsed),
+            'sse': {
+                'clients_per_endpoint': options['sse_clients'],
+                'frames': dict(sse['frames']),
+                'errors': dict(sse['errors']),
+            },
+        }
+
+    def play(self, player, by_category, options, stats):
+        client = Client()
+        client.force_login(player)
+
+        def request(name, method, url, data=None):
+            queries = QueryTimer()
+            started = time.perf_counter()
+            error = None
+            try:
+                with connection.execute_wrapper(queries):
+                    status = getattr(client, method)(url, data).status_code
+                if status >= 400:
+                    error = f"HTTP {status}"
+            except Exception as exc:  # e.g. lock timeouts under SQLite; counted, not fatal
+                error = f"{type(exc).__name__}: {exc}"
+            stats.record(name, time.perf_counter() - started, queries.count, error)
+
+        for _ in range(options['rounds']):
+            category = random.choice([category for category, questions in by_category.items() if questions])
+            question = random.choice(by_category[category])
+            answer = question.answer if random.random() < options['accuracy'] else 'wrong'
+            request('question_categories', 'get', reverse('question_categories'))
+            request('questions_in_category', 'get', reverse('questions_in_category', args=[category]))
+            request('view_question', 'get', reverse('view_question', args=[question.id]))
+            request('submit_answer', 'post', reverse('submit_answer', args=[question.id]), {'answer': answer})
+
+    def watch_streams(self, staff, clients, sse):
+        pending = len(SSE_ENDPOINTS) * clients
+
+        def settled():
+            nonlocal pending
+            pending -= 1
+            if not pending:
+                sse['connected'].set()
+
+        async def watch(endpoint):
+            connected = False
+            try:
+                client = AsyncClient()
+                await client.aforce_login(staff)
+                response = await client.get(reverse(endpoint))
+                if response.status_code != 200:
+                    raise RuntimeError(f"HTTP {response.status_code}")
+                connected = True
+                settled()
+                async for _ in response.streaming_content:
+                    sse['frames'][endpoint] += 1
+            except Exception as exc:  # Reported rather than lost in gather(), which used to leave frames empty
+                sse['errors'][f"{endpoint}: {type(exc).__name__}: {exc}"] += 1
+                if not connected:
+                    settled()
+
+        async def main():
+            if not pending:
+                sse['connected'].set()
+            tasks = [asyncio.create_task(watch(endpoint)) for endpoint in SSE_ENDPOINTS for _ in range(clients)]
+            while not sse['stop'].is_set():
+                await asyncio.sleep(0.1)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        asyncio.run(main())
+
+    def peak_rss_mb(self):
+        if resource is None:
+            return None
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)  # ru_maxrss is KiB on Linux
+
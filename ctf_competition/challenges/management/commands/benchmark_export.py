@@ -0,0 +1,67 @@
+import random
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from challenges import export
+from challenges.benchmarking import create_players, format_table, throwaway_database
+from challenges.models import Question, Submission
+
+
+class Command(BaseCommand):
+    help = (
+        "Export growing numbers of submissions and report peak Python memory for each; "
+        "the peak should stay flat as rows grow (throwaway database)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 300_000])
+        parser.add_argument('--format', choices=sorted(export.FORMATS), default='csv')
+        parser.add_argument('--gzip', action='store_true')
+
+    def handle(self, *args, **options):
+        results = []
+        with throwaway_database():
+            users = create_players(200)
+            questions = Question.objects.bulk_create([
+                Question(title=f'Question {i}', description='', answer='flag', category='Other') for i in range(50)
+            ])
+            if questions[0].pk is None:
+                questions = list(Question.objects.all())
+            created = 0
+            for target in sorted(options['rows']):
+                self.add_submissions(target - created, users, questions)
+                created = target
+                results.append([target, *self.measure(options['format'], options['gzip'])])
+
+        self.stdout.write(format_table(
+            ['rows', 'bytes out', 'seconds', 'rows/s', 'peak memory (KiB)'],
+            [[rows, size, f'{seconds:.2f}', f'{rows / seconds:,.0f}', f'{peak / 1024:,.0f}']
+             for rows, size, seconds, peak in results],
+        ))
+
+    def add_submissions(self, count, users, questions, batch_size=5000):
+        started = now() - timedelta(hours=2)
+        for offset in range(0, count, batch_size):
+            Submission.objects.bulk_create([
+                Submission(
+                    user=random.choice(users), question=random.choice(questions),
+                    submitted_answer=f'guess {offset + i}', is_correct=False,
+                )
+                for i in range(min(batch_size, count - offset))
+            ])
+        Submission.objects.filter(timestamp__gte=started).update(timestamp=started)
+
+    def measure(self, format, compress):
+        size = 0
+        tracemalloc.start()
+        started = time.perf_counter()
+        for chunk in export.export_stream(format, {}, compress=compress):
+            size += len(chunk)
+        seconds = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return size, seconds, peak
@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils.timezone import now
+
+from challenges.benchmarking import best_of, create_players, format_table, throwaway_database
+from challenges.fragments import question_fragments
+from challenges.models import ChallengeTimer, Question
+
+
+class Command(BaseCommand):
+    help = (
+        "Time question and category pages with every fragment rendered afresh and with the fragment cache "
+        "(runs in a throwaway test database)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lengths', type=int, nargs='+', default=[1_000, 10_000, 100_000],
+                            help="Description lengths, in characters")
+        parser.add_argument('--category-size', type=int, default=50, help="Questions on the category page")
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with throwaway_database(), override_settings(ALLOWED_HOSTS=['*']):
+            ChallengeTimer.objects.create(start_time=now(), duration=timedelta(hours=1))
+            client = Client()
+            client.force_login(create_players(1)[0])
+
+            pages = []
+            for length in options['lengths']:
+                question = Question.objects.create(
+                    title=f'{length} characters', description=('Lorem <ipsum> & dolor ' * length)[:length],
+                    answer='a', category='Other', is_multiple_choice=True,
+                    option_1='<alpha>', option_2='"beta"', option_3='gamma & delta', option_4='epsilon',
+                )
+                pages.append((f'question, {length} chars', reverse('view_question', args=[question.id])))
+            Question.objects.bulk_create([
+                Question(title=f'Question {i}', description='Benchmark question ' * 50, answer='a', category='HTML')
+                for i in range(options['category_size'])
+            ])
+            pages.append((f"category, {options['category_size']} questions",
+                          reverse('questions_in_category', args=['HTML'])))
+
+            rows = []
+            for name, url in pages:
+                client.get(url)
+
+                def uncached():
+                    question_fragments.clear()
+                    client.get(url)
+
+                cold = best_of(uncached, options['repeat'])
+                warm = best_of(lambda: client.get(url), options['repeat'])
+                rows.append([name, f'{cold * 1000:.2f}', f'{warm * 1000:.2f}', f'{cold / warm:.1f}x'])
+
+        self.stdout.write(format_table(['page', 'rendered (ms)', 'cached (ms)', 'speedup'], rows))
+        self.stdout.write(f"Fragment cache: {len(question_fragments)} entries, {question_fragments.size} characters")
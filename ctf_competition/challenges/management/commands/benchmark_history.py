@@ -0,0 +1,100 @@
+import json
+import random
+import tracemalloc
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.utils.timezone import now
+
+from challenges.benchmarking import best_of, create_players, format_table, throwaway_database
+from challenges.history import ScoreHistory, score_history
+from challenges.leaderboard import leaderboard
+from challenges.models import Question, Submission
+from challenges.scoring import repair
+from challenges.views import score_history_view
+
+
+class Command(BaseCommand):
+    help = "Time score-history graphs for the top players of a long event (runs in a throwaway test database)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=1000)
+        parser.add_argument('--questions', type=int, default=60)
+        parser.add_argument('--hours', type=int, default=48)
+        parser.add_argument('--solve-rate', type=float, default=0.5, help="Share of questions each player solves")
+        parser.add_argument('--points', type=int, default=200, help="Samples per player")
+        parser.add_argument('--decay', type=int, default=50, help="Solves over which dynamic questions decay")
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        with throwaway_database():
+            solves = self.populate(options)
+            leaderboard.reset()
+            score_history.reset()
+
+            load = best_of(lambda: (score_history.reset(), len(score_history)), repeat=1)
+            score_history.reset()
+            tracemalloc.start()
+            len(score_history)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.stdout.write(
+                f"{options['players']} players, {solves} solves over {options['hours']}h: replayed in "
+                f"{load * 1000:.0f} ms (peak {peak / 2 ** 20:.1f} MiB), "
+                f"series hold {score_history.memory() / 2 ** 20:.2f} MiB"
+            )
+
+            window = (score_history.span()[0], now().timestamp())
+            staff = User.objects.create(username='benchmark-staff', is_staff=True)
+            rows = []
+            for top in (10, 100, options['players']):
+                request = RequestFactory().get('/scoreboard/history/', {'top': top, 'points': options['points']})
+                request.user = staff
+                response = score_history_view(request)
+                sent = sum(len(series['scores']) for series in json.loads(response.content)['series'])
+
+                def rescan():
+                    history = ScoreHistory()
+                    history.sample(user_ids, *window, options['points'])
+
+                user_ids = [row['user_id'] for row in leaderboard.top(top)]
+                rows.append([
+                    top, sent, f'{len(response.content) / 1024:.0f}',
+                    f"{best_of(lambda: score_history.sample(user_ids, *window, options['points']), options['repeat']) * 1000:.1f}",
+                    f"{best_of(lambda: score_history_view(request), options['repeat']) * 1000:.1f}",
+                    f"{best_of(rescan, 1) * 1000:.0f}",
+                ])
+        self.stdout.write(format_table(
+            ['top', 'scores sent', 'response (KiB)', 'sample (ms)', 'endpoint (ms)', 'rescan per view (ms)'], rows,
+        ))
+
+    def populate(self, options):
+        users = create_players(options['players'])
+        questions = Question.objects.bulk_create([
+            Question(
+                title=f'Question {i}', description='', answer='answer', points=random.randrange(100, 600, 50),
+                dynamic_scoring=i % 3 == 0, minimum_points=50, decay=options['decay'],
+            )
+            for i in range(options['questions'])
+        ])
+        if questions[0].pk is None:
+            questions = list(Question.objects.order_by('id'))
+
+        submissions = [
+            Submission(user=user, question=question, submitted_answer='answer', is_correct=True, first_solve=True)
+            for user in users for question in questions if random.random() < options['solve_rate']
+        ]
+        created = Submission.objects.bulk_create(submissions, batch_size=5000)
+        if created[0].pk is None:
+            created = list(Submission.objects.order_by('id'))
+        # auto_now_add stamps every row with the same instant: spread them over the event
+        start = now() - timedelta(hours=options['hours'])
+        for submission in created:
+            submission.timestamp = start + timedelta(seconds=random.uniform(0, options['hours'] * 3600))
+        Submission.objects.bulk_update(created, ['timestamp'], batch_size=2000)
+        repair()
+        return len(created)
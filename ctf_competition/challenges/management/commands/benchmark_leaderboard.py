@@ -0,0 +1,59 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from challenges.benchmarking import best_of, create_players, format_table, throwaway_database
+from challenges.leaderboard import Leaderboard
+from challenges.models import PlayerScore
+
+
+class Command(BaseCommand):
+    help = "Compare the in-memory leaderboard index with ORM ordering (runs in a throwaway test database)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, nargs='+', default=[10_000, 100_000])
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows = []
+        with throwaway_database():
+            for count in options['players']:
+                rows.append(self.run(count, options['top'], options['repeat']))
+                PlayerScore.objects.all().delete()
+                connection.cursor().execute('DELETE FROM auth_user')
+
+        headers = ['players', 'operation', 'orm (ms)', 'index (ms)', 'speedup']
+        self.stdout.write(format_table(headers, [
+            [count, operation, f'{orm * 1000:.3f}', f'{index * 1000:.3f}', f'{orm / index:.0f}x']
+            for count, results in rows for operation, orm, index in results
+        ]))
+
+    def run(self, count, top, repeat):
+        users = create_players(count, score=lambda i: random.randrange(0, 5000, 50))
+        target = random.choice(users)
+        board = Leaderboard()
+        load_time = best_of(lambda: (board.reset(), len(board)), repeat=1)
+        self.stdout.write(f"Loaded {count} players into the index in {load_time * 1000:.0f} ms")
+
+        def orm_top():
+            list(PlayerScore.objects.order_by('-score', 'user_id').values_list('user__username', 'score')[:top])
+
+        def orm_rank():
+            score = PlayerScore.objects.get(user=target).score
+            PlayerScore.objects.filter(score__gt=score).count()
+
+        def orm_update():
+            PlayerScore.objects.filter(user=target).update(score=random.randrange(0, 5000, 50))
+            orm_rank()
+
+        def index_update():
+            board.record_score(target.id, target.username, random.randrange(0, 5000, 50), None)
+            board.rank(target.id)
+
+        return count, [
+            ('top %d' % top, best_of(orm_top, repeat), best_of(lambda: board.top(top), repeat)),
+            ('rank of user', best_of(orm_rank, repeat), best_of(lambda: board.rank(target.id), repeat)),
+            ('update + rank', best_of(orm_update, repeat), best_of(index_update, repeat)),
+        ]
@@ -0,0 +1,113 @@
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils.timezone import now
+
+from challenges import auth
+from challenges.benchmarking import create_players, format_table, percentile, throwaway_database
+from challenges.models import ChallengeTimer
+
+PASSWORD = 'benchmark-password'
+MODES = [
+    ('before', {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTHENTICATION_BACKENDS': ['django.contrib.auth.backends.ModelBackend'],
+        'PASSWORD_HASHERS': ['django.contrib.auth.hashers.PBKDF2PasswordHasher'],
+    }),
+    ('after', {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+        'AUTHENTICATION_BACKENDS': ['challenges.auth.CachedModelBackend'],
+        'PASSWORD_HASHERS': ['challenges.auth.ThrottledPBKDF2PasswordHasher'],
+    }),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire a burst of concurrent logins while a logged-in player keeps browsing, with the stock session, "
+        "backend and hasher and then with the cached/throttled ones (runs in a throwaway test database)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=500)
+        parser.add_argument(
+            '--iterations', type=int, default=PBKDF2PasswordHasher.iterations,
+            help="PBKDF2 iterations; lower it for a quick run on small machines",
+        )
+
+    def handle(self, *args, **options):
+        with throwaway_database(on_disk=True), override_settings(ALLOWED_HOSTS=['*']), \
+                mock.patch.object(PBKDF2PasswordHasher, 'iterations', options['iterations']):
+            players = create_players(options['logins'] + 1, password=make_password(PASSWORD))
+            ChallengeTimer.objects.create(start_time=now(), duration=timedelta(hours=1))
+            rows = []
+            for mode, config in MODES:
+                with override_settings(**config):
+                    auth._slots = None
+                    auth.user_cache.invalidate()
+                    rows.append([mode, *self.storm(players[0], players[1:])])
+
+        self.stdout.write(format_table(
+            ['mode', 'logins ok', 'wall (s)', 'login p50 (ms)', 'login p95 (ms)',
+             'browse p50 (ms)', 'browse p95 (ms)', 'queries/request'],
+            rows,
+        ))
+
+    def storm(self, browser, players):
+        client = Client()
+        client.force_login(browser)
+        url = reverse('question_categories')
+        client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            client.get(url)
+
+        logins, browsing, done = [], [], threading.Event()
+        barrier = threading.Barrier(len(players) + 1)
+
+        def log_in(player):
+            barrier.wait()
+            started = time.perf_counter()
+            try:
+                response = Client().post(reverse('login'), {'username': player.username, 'password': PASSWORD})
+                ok = response.status_code == 302
+            except Exception as exc:  # e.g. lock timeouts under SQLite; counted, not fatal
+                self.stderr.write(f"login: {exc}")
+                ok = False
+            logins.append((time.perf_counter() - started, ok))
+            connection.close()
+
+        def browse():
+            barrier.wait()
+            while not done.is_set():
+                started = time.perf_counter()
+                client.get(url)
+                browsing.append(time.perf_counter() - started)
+            connection.close()
+
+        threads = [threading.Thread(target=log_in, args=(player,)) for player in players]
+        browser_thread = threading.Thread(target=browse)
+        started = time.perf_counter()
+        for thread in [*threads, browser_thread]:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        done.set()
+        browser_thread.join()
+
+        login_times = sorted(seconds for seconds, _ in logins)
+        browsing.sort()
+        return [
+            f"{sum(ok for _, ok in logins)}/{len(players)}", f'{elapsed:.1f}',
+            f'{percentile(login_times, 0.5) * 1000:.0f}', f'{percentile(login_times, 0.95) * 1000:.0f}',
+            f'{percentile(browsing, 0.5) * 1000:.1f}', f'{percentile(browsing, 0.95) * 1000:.1f}',
+            len(queries),
+        ]
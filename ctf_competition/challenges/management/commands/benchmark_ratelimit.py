@@ -0,0 +1,46 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils.timezone import now
+
+from challenges import ratelimit
+from challenges.benchmarking import create_players, format_table, throwaway_database
+from challenges.models import ChallengeTimer, Question
+
+
+class Command(BaseCommand):
+    help = "Flood submit_answer from one player and report queries and latency per response (throwaway database)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        logging.getLogger('django.request').setLevel(logging.ERROR)  # One warning per 429 otherwise
+        with throwaway_database(), override_settings(ALLOWED_HOSTS=['*']):
+            ratelimit._limiter = None  # Fresh in-memory buckets for this run
+            ChallengeTimer.objects.create(start_time=now(), duration=timedelta(hours=1))
+            question = Question.objects.create(title='Flood', description='', answer='flag', max_attempts=5)
+            player = create_players(1)[0]
+            client = Client()
+            client.force_login(player)
+            url = reverse('submit_answer', args=[question.id])
+
+            results = {}
+            for _ in range(options['requests']):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    status = client.post(url, {'answer': 'guess'}).status_code
+                    elapsed = time.perf_counter() - started
+                count, total_queries, total_time = results.get(status, (0, 0, 0))
+                results[status] = (count + 1, total_queries + len(queries), total_time + elapsed)
+
+        self.stdout.write(format_table(['status', 'responses', 'queries/response', 'ms/response'], [
+            [status, count, f'{queries / count:.1f}', f'{seconds / count * 1000:.3f}']
+            for status, (count, queries, seconds) in sorted(results.items())
+        ]))
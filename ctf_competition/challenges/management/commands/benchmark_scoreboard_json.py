@@ -0,0 +1,65 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from challenges.benchmarking import create_players, format_table, throwaway_database
+from challenges.leaderboard import leaderboard
+
+
+class Command(BaseCommand):
+    help = (
+        "Poll the public JSON scoreboard while no score changes, with and without If-None-Match "
+        "(runs in a throwaway test database)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=10_000)
+        parser.add_argument('--top', type=int, nargs='+', default=[10, 100, 1000])
+        parser.add_argument('--requests', type=int, default=2000, help="Requests per measurement")
+
+    def handle(self, *args, **options):
+        rows = []
+        with throwaway_database(), override_settings(ALLOWED_HOSTS=['*']):
+            create_players(options['players'], score=lambda i: random.randrange(0, 5000, 50))
+            leaderboard.reset()
+            client = Client()
+            url = reverse('scoreboard_json')
+            try:
+                for top in options['top']:
+                    first = client.get(url, {'top': top})
+                    if first.status_code != 200 or 'ETag' not in first:
+                        raise CommandError(f"Unexpected first response: {first.status_code}")
+                    etag = first['ETag']
+
+                    full, full_queries = self.poll(options['requests'], lambda: client.get(url, {'top': top}), 200)
+                    conditional, conditional_queries = self.poll(
+                        options['requests'], lambda: client.get(url, {'top': top}, headers={'If-None-Match': etag}),
+                        304,
+                    )
+                    rows.append([
+                        top, len(first.content), f'{full:.0f}', full_queries,
+                        f'{conditional:.0f}', conditional_queries, f'{conditional / full:.1f}x',
+                    ])
+            finally:
+                leaderboard.reset()
+
+        self.stdout.write(format_table(
+            ['top', 'body (bytes)', '200 (req/s)', 'queries', '304 (req/s)', 'queries', 'speedup'], rows,
+        ))
+
+    def poll(self, count, request, expected_status):
+        """Requests per second over ``count`` requests, and the queries run by the last one."""
+        started = time.perf_counter()
+        for _ in range(count):
+            response = request()
+            if response.status_code != expected_status:
+                raise CommandError(f"Expected {expected_status}, got {response.status_code}")
+        elapsed = time.perf_counter() - started
+        with CaptureQueriesContext(connection) as queries:
+            request()
+        return count / elapsed, len(queries)
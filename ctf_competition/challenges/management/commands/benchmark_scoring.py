@@ -0,0 +1,104 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
+
+from challenges.benchmarking import best_of, create_players, format_table, throwaway_database
+from challenges.models import PlayerScore, Question, Submission
+from challenges.scoring import dynamic_values, expected_scores, question_value, repair, reprice, verify
+
+
+class Command(BaseCommand):
+    help = (
+        "Time score recomputation and dynamic repricing against per-player loops "
+        "(runs in a throwaway test database)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=2000)
+        parser.add_argument('--questions', type=int, default=100)
+        parser.add_argument('--submissions', type=int, default=100_000)
+        parser.add_argument('--dynamic', type=float, default=0.5, help="Share of questions with dynamic scoring")
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        with throwaway_database():
+            self.populate(options)
+            rows = self.run(options['repeat'])
+            if verify()[0]:
+                raise CommandError("Scores drifted from their solves during the benchmark")
+        self.stdout.write(format_table(['operation', 'engine (ms)', 'baseline', 'baseline (ms)', 'speedup'], [
+            [name, f'{engine * 1000:.1f}', baseline, f'{slow * 1000:.1f}', f'{slow / engine:.0f}x']
+            for name, engine, baseline, slow in rows
+        ]))
+
+    def populate(self, options):
+        users = create_players(options['players'])
+        questions = Question.objects.bulk_create([
+            Question(
+                title=f'Question {i}', description='', answer='answer', points=random.randrange(100, 600, 50),
+                dynamic_scoring=random.random() < options['dynamic'], minimum_points=50, decay=options['players'] // 4,
+            )
+            for i in range(options['questions'])
+        ])
+        if questions[0].pk is None:
+            questions = list(Question.objects.order_by('id'))
+
+        solved, submissions = set(), []
+        for _ in range(options['submissions']):
+            user, question = random.choice(users), random.choice(questions)
+            first = (user.id, question.id) not in solved and random.random() < 0.4
+            if first:
+                solved.add((user.id, question.id))
+            submissions.append(Submission(
+                user=user, question=question, submitted_answer='answer' if first else 'wrong',
+                is_correct=first, first_solve=True if first else None,
+            ))
+        Submission.objects.bulk_create(submissions, batch_size=5000)
+        repair()
+        self.stdout.write(
+            f"{len(users)} players, {len(questions)} questions, {len(submissions)} submissions "
+            f"({len(solved)} solves)"
+        )
+
+    def run(self, repeat):
+        def naive_verify():
+            mismatches = 0
+            for score in PlayerScore.objects.all():
+                total = 0
+                for solve in Submission.objects.filter(user_id=score.user_id, first_solve=True).select_related('question'):
+                    question = solve.question
+                    if question.dynamic_scoring:
+                        solves = Submission.objects.filter(question=question, first_solve=True).count()
+                        total += question_value(question.points, question.minimum_points, question.decay, solves)
+                    else:
+                        total += question.points
+                mismatches += total != score.score
+            return mismatches
+
+        question = Question.objects.filter(dynamic_scoring=True).order_by('?').first()
+        solvers = list(Submission.objects.filter(question=question, first_solve=True).values_list('user_id', flat=True))
+
+        def stale():
+            # Pretend the latest solve has not been priced in yet
+            Question.objects.filter(pk=question.pk).update(current_points=question.points)
+            PlayerScore.objects.filter(user_id__in=solvers).update(score=F('score') + question.points - question.value)
+
+        def timed_reprice():
+            stale()
+            reprice(question.pk)
+
+        def timed_repair():
+            stale()
+            repair()
+
+        naive = best_of(naive_verify, 1)
+        return [
+            ('recompute all scores', best_of(lambda: expected_scores(dynamic_values()), repeat),
+             'per-player loop', naive),
+            ('verify all scores', best_of(verify, repeat), 'per-player loop', naive),
+            (f'reprice 1 question ({len(solvers)} solvers)', best_of(timed_reprice, repeat),
+             'full repair', best_of(timed_repair, repeat)),
+        ]
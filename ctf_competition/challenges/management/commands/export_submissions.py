@@ -0,0 +1,36 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from challenges import export
+
+
+class Command(BaseCommand):
+    help = "Stream all submissions as CSV or NDJSON, optionally gzip-compressed, in constant memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(export.FORMATS), default='csv')
+        parser.add_argument('--output', default='-', help="File to write, or - for stdout")
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--since', help="ISO date or datetime")
+        parser.add_argument('--until', help="ISO date or datetime; a bare date includes the whole day")
+        parser.add_argument('--category')
+        parser.add_argument('--user', help="Username")
+
+    def handle(self, *args, **options):
+        try:
+            filters = export.parse_filters(
+                **{key: options[key] for key in ('since', 'until', 'category', 'user')}
+            )
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        stream = export.export_stream(options['format'], filters, compress=options['gzip'])
+        if options['output'] == '-':
+            for chunk in stream:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+        else:
+            with open(options['output'], 'wb') as output:
+                for chunk in stream:
+                    output.write(chunk)
@@ -0,0 +1,158 @@
+import csv
+import json
+import os
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from challenges.catalog import question_changed
+from challenges.models import Question
+
+IMPORT_FIELDS = [
+    'title', 'description', 'points', 'answer', 'alternate_answers', 'answer_mode', 'flag_prefix',
+    'category', 'is_multiple_choice', 'option_1', 'option_2', 'option_3', 'option_4', 'max_attempts',
+    'dynamic_scoring', 'minimum_points', 'decay',
+]
+BOOLEAN_FIELDS = {'is_multiple_choice', 'dynamic_scoring'}
+SCORING_FIELDS = {'points', 'dynamic_scoring', 'minimum_points', 'decay'}
+TRUE_STRINGS = {'1', 'true', 'yes', 'y', 't'}
+FALSE_STRINGS = {'0', 'false', 'no', 'n', 'f', ''}
+
+
+class PackError(Exception):
+    pass
+
+
+def load_pack(path):
+    """Return the pack's entries as a list of dicts, whatever the file format."""
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, encoding='utf-8', newline='') as pack:
+        if extension == '.csv':
+            # Blank cells fall back to the model default rather than overwriting with ''
+            return [{key: value for key, value in row.items() if value != ''} for row in csv.DictReader(pack)]
+        if extension == '.json':
+            data = json.load(pack)
+        elif extension in ('.yaml', '.yml'):
+            import yaml
+            try:
+                data = yaml.safe_load(pack)
+            except yaml.YAMLError as exc:  # Not a ValueError, unlike JSON and CSV decode errors
+                raise PackError(exc)
+        else:
+            raise PackError(f"Unsupported pack format {extension!r}; use .json, .yaml, .yml or .csv")
+    if isinstance(data, dict):
+        data = data.get('questions')
+    if not isinstance(data, list):
+        raise PackError("A pack must be a list of questions or an object with a 'questions' list")
+    return data
+
+
+def build_question(entry):
+    """Validate one pack entry and return an unsaved Question, or raise ValidationError."""
+    if not isinstance(entry, dict):
+        raise ValidationError("Each question must be a mapping of field names to values")
+    unknown = set(entry) - set(IMPORT_FIELDS) - {'slug'}
+    if unknown:
+        raise ValidationError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    if not entry.get('slug'):
+        raise ValidationError("Missing slug")
+
+    values = dict(entry)
+    for field in BOOLEAN_FIELDS & set(values):
+        if isinstance(values[field], str):
+            text = values[field].strip().lower()
+            if text not in TRUE_STRINGS | FALSE_STRINGS:
+                raise ValidationError({field: f"Not a boolean: {values[field]!r}"})
+            values[field] = text in TRUE_STRINGS
+    question = Question(**values)
+    question.full_clean(validate_unique=False)  # Uniqueness is checked for the whole pack at once
+    return question
+
+
+class Command(BaseCommand):
+    help = (
+        "Create or update questions from a JSON, YAML or CSV pack, matched on slug. The whole pack is "
+        "validated first and written in one transaction, so a failure leaves the database untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('pack')
+        parser.add_argument('--dry-run', action='store_true', help="Validate and report without writing")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        try:
+            entries = load_pack(options['pack'])
+        except (OSError, ValueError, PackError) as exc:  # JSON/CSV decode errors are ValueErrors
+            raise CommandError(f"Could not read {options['pack']}: {exc}")
+
+        questions = self.validate(entries)
+        existing = {
+            question.slug: question
+            for question in Question.objects.filter(slug__in=[q.slug for q in questions]).only('slug', *IMPORT_FIELDS)
+        }
+
+        to_create, to_update, changed_fields = [], [], set()
+        for question in questions:
+            current = existing.get(question.slug)
+            if current is None:
+                to_create.append(question)
+                continue
+            changed = [field for field in IMPORT_FIELDS if getattr(current, field) != getattr(question, field)]
+            if changed:
+                question.pk = current.pk
+                to_update.append(question)
+                changed_fields.update(changed)
+                if options['verbosity'] >= 2:
+                    self.stdout.write(f"  update {question.slug}: {', '.join(changed)}")
+        if options['verbosity'] >= 2:
+            for question in to_create:
+                self.stdout.write(f"  create {question.slug}")
+
+        if not options['dry_run'] and (to_create or to_update):
+            with transaction.atomic():
+                Question.objects.bulk_create(to_create, batch_size=options['batch_size'])
+                if to_update:
+                    fields = [field for field in IMPORT_FIELDS if field in changed_fields]
+                    Question.objects.bulk_update(to_update, fields, batch_size=options['batch_size'])
+                # bulk_* skip post_save, so tell every process to rebuild the catalog here
+                question_changed(Question)
+
+        unchanged = len(questions) - len(to_create) - len(to_update)
+        prefix = "Would import" if options['dry_run'] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {len(questions)} questions: {len(to_create)} created, "
+            f"{len(to_update)} updated, {unchanged} unchanged."
+        ))
+        if changed_fields & SCORING_FIELDS:
+            # Existing solvers keep the totals they were given until those are recomputed
+            self.stdout.write(self.style.WARNING(
+                "Scoring fields changed on existing questions; run reconcile_scores --repair "
+                "to bring players' totals and question values in line."
+            ))
+
+    def validate(self, entries):
+        questions, errors, seen = [], [], {}
+        for index, entry in enumerate(entries, start=1):
+            slug = entry.get('slug') if isinstance(entry, dict) else None
+            label = f"#{index}" + (f" ({slug})" if slug else '')
+            if slug in seen:
+                errors.append(f"{label} duplicates the slug of #{seen[slug]}")
+                continue
+            if slug:
+                seen[slug] = index
+            try:
+                question = build_question(entry)
+            except (ValidationError, TypeError) as exc:
+                messages = exc.message_dict if hasattr(exc, 'error_dict') else {'': getattr(exc, 'messages', [str(exc)])}
+                for field, field_errors in messages.items():
+                    errors.append(f"{label} {field + ': ' if field else ''}{'; '.join(field_errors)}")
+                continue
+            questions.append(question)
+
+        if errors:
+            shown = errors[:50]
+            more = f"\n... and {len(errors) - len(shown)} more" if len(errors) > len(shown) else ''
+            raise CommandError(f"{len(errors)} invalid questions, nothing imported:\n" + '\n'.join(shown) + more)
+        return questions
@@ -0,0 +1,106 @@
+import csv
+import os
+import time
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from challenges.leaderboard import publish_joined
+from challenges.models import PlayerScore
+from challenges.passwords import generate_password, hash_passwords
+
+
+def read_roster(path):
+    """
+    Return ``[(username, password or None, email)]`` from a CSV file with a
+    ``username`` column (``password`` and ``email`` optional) or a plain
+    text file with one username per line.
+    """
+    with open(path, encoding='utf-8', newline='') as roster:
+        if os.path.splitext(path)[1].lower() == '.csv':
+            reader = csv.DictReader(roster)
+            if 'username' not in (reader.fieldnames or []):
+                raise CommandError("The roster CSV needs a 'username' column")
+            return [
+                (row['username'].strip(), (row.get('password') or '').strip() or None, (row.get('email') or '').strip())
+                for row in reader if (row['username'] or '').strip()
+            ]
+        return [(line.strip(), None, '') for line in roster if line.strip()]
+
+
+class Command(BaseCommand):
+    help = (
+        "Create player accounts from a roster file. Passwords are generated where the roster has none, "
+        "hashed in parallel, and written with the usernames to a credentials sheet."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('roster', help="CSV with a username column (password, email optional) or one username per line")
+        parser.add_argument('--output', default='credentials.csv', help="Credentials sheet to write")
+        parser.add_argument('--workers', type=int, default=None, help="Hashing processes (default: all cores)")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--skip-existing', action='store_true', help="Leave existing usernames alone instead of failing")
+
+    def handle(self, *args, **options):
+        roster = read_roster(options['roster'])
+        self.validate(roster)
+
+        existing = set(User.objects.filter(username__in=[username for username, _, _ in roster])
+                       .values_list('username', flat=True))
+        if existing and not options['skip_existing']:
+            raise CommandError(f"{len(existing)} usernames already exist, e.g. {', '.join(sorted(existing)[:5])}. "
+                               "Use --skip-existing to provision only the new ones.")
+        accounts = [
+            (username, password or generate_password(), email)
+            for username, password, email in roster if username not in existing
+        ]
+        if not accounts:
+            self.stdout.write("Nothing to provision.")
+            return
+
+        started = time.perf_counter()
+        hashes = hash_passwords([password for _, password, _ in accounts], options['workers'])
+        hashed_in = time.perf_counter() - started
+
+        with transaction.atomic():
+            users = User.objects.bulk_create(
+                [User(username=username, email=email, password=hashed)
+                 for (username, _, email), hashed in zip(accounts, hashes)],
+                batch_size=options['batch_size'],
+            )
+            if users[0].pk is None:  # Backends that do not return primary keys
+                users = User.objects.filter(username__in=[username for username, _, _ in accounts])
+            PlayerScore.objects.bulk_create(
+                [PlayerScore(user=user) for user in users], batch_size=options['batch_size'],
+            )
+            publish_joined([(user.pk, user.username) for user in users])  # bulk_create skips post_save
+
+        # The sheet holds plain-text passwords: keep it readable by its owner only
+        descriptor = os.open(options['output'], os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(descriptor, 'w', encoding='utf-8', newline='') as sheet:
+            writer = csv.writer(sheet)
+            writer.writerow(['username', 'password'])
+            writer.writerows((username, password) for username, password, _ in accounts)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Provisioned {len(accounts)} accounts in {time.perf_counter() - started:.1f}s "
+            f"(hashing {hashed_in:.1f}s), skipped {len(existing)} existing. "
+            f"Credentials written to {options['output']}."
+        ))
+
+    def validate(self, roster):
+        errors, seen = [], set()
+        for index, (username, _, _) in enumerate(roster, start=1):
+            if username in seen:
+                errors.append(f"line {index}: duplicate username {username!r}")
+            seen.add(username)
+            try:
+                User.username_validator(username)
+                if len(username) > User._meta.get_field('username').max_length:
+                    raise ValidationError("too long")
+            except ValidationError as exc:
+                errors.append(f"line {index}: invalid username {username!r}: {'; '.join(exc.messages)}")
+        if errors:
+            raise CommandError(f"{len(errors)} roster errors, nothing provisioned:\n" + '\n'.join(errors[:50]))
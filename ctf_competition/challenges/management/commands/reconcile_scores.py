@@ -0,0 +1,39 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from challenges.scoring import repair, verify
+from challenges.submissions import retry_on_lock_conflict
+
+
+class Command(BaseCommand):
+    help = (
+        "Check every player's stored score against one recomputed from their solves, "
+        "and with --repair rewrite the ones that disagree."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repair', action='store_true', help="Fix mismatched scores and question values")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--show', type=int, default=20, help="How many mismatches to list")
+
+    def handle(self, *args, **options):
+        if options['repair']:
+            mismatches = retry_on_lock_conflict(repair, options['batch_size'])
+        else:
+            mismatches, _ = verify()
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("All scores match their solves."))
+            return
+
+        usernames = dict(User.objects.filter(id__in=[user_id for user_id, _, _ in mismatches[:options['show']]])
+                         .values_list('id', 'username'))
+        for user_id, stored, expected in mismatches[:options['show']]:
+            self.stdout.write(f"  {usernames.get(user_id, user_id)}: stored {stored}, expected {expected}")
+        if len(mismatches) > options['show']:
+            self.stdout.write(f"  ... and {len(mismatches) - options['show']} more")
+
+        if options['repair']:
+            self.stdout.write(self.style.SUCCESS(f"Repaired {len(mismatches)} scores."))
+        else:
+            raise CommandError(f"{len(mismatches)} scores do not match their solves. Run with --repair to fix them.")
@@ -0,0 +1,146 @@
+"""
+Prometheus instrumentation, exposed to staff on ``/metrics/``.
+
+``MetricsMiddleware`` times every request and, for synchronous views, counts
+the queries it ran and the time spent in them. Requests are labelled with the
+URL name rather than the path so the number of series stays fixed. Values
+that already live in memory (event rings, open streams, the LED queue, the
+fragment cache) are read by ``LiveStateCollector`` only when ``/metrics/`` is
+scraped, so they cost nothing between scrapes.
+"""
+import time
+from contextlib import aclosing
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connection
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+REQUEST_LATENCY = Histogram(
+    'ctf_request_duration_seconds', "Time until the response (or its headers, for streams) is ready.",
+    ['view', 'method'],
+)
+REQUESTS = Counter('ctf_requests_total', "Requests by view and status class.", ['view', 'method', 'status'])
+DB_QUERIES = Histogram(
+    'ctf_request_db_queries', "Queries run by one request.", ['view'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+DB_TIME = Histogram(
+    'ctf_request_db_seconds', "Time one request spent in the database.", ['view'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+SUBMISSIONS = Counter('ctf_submissions_total', "Answer submissions by outcome.", ['outcome'])
+RATE_LIMITED = Counter('ctf_rate_limited_total', "Requests rejected by the rate limiter.", ['scope'])
+SSE_CONNECTIONS = Gauge('ctf_sse_connections', "Open server-sent event streams.", ['stream'])
+
+
+def view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else '<unresolved>'
+
+
+class QueryTimer:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        queries = QueryTimer()
+        started = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        self.observe(request, response, time.perf_counter() - started)
+        view = view_label(request)
+        DB_QUERIES.labels(view).observe(queries.count)
+        DB_TIME.labels(view).observe(queries.seconds)
+        return response
+
+    async def __acall__(self, request):
+        # Queries run on sync_to_async threads here, so only latency is recorded
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, response, time.perf_counter() - started)
+        return response
+
+    def observe(self, request, response, seconds):
+        view = view_label(request)
+        REQUEST_LATENCY.labels(view, request.method).observe(seconds)
+        REQUESTS.labels(view, request.method, f'{response.status_code // 100}xx').inc()
+
+
+async def tracked_stream(name, stream):
+    """Wrap an SSE async generator so it is counted in ``ctf_sse_connections`` while open."""
+    gauge = SSE_CONNECTIONS.labels(name)
+    gauge.inc()
+    try:
+        async with aclosing(stream):
+            async for frame in stream:
+                yield frame
+    finally:
+        gauge.dec()
+
+
+class LiveStateCollector:
+    """Reads in-memory queue sizes and LED statistics at scrape time."""
+
+    def describe(self):
+        return []  # Stops the registry from calling collect() at import time
+
+    def collect(self):
+        from .eventbus import get_event_bus
+        from .fragments import question_fragments
+        from .led_controller import led_worker
+
+        buffered = GaugeMetricFamily('ctf_event_ring_events', "Events buffered for stream resume.", labels=['topic'])
+        waiting = GaugeMetricFamily('ctf_event_ring_waiters', "Streams waiting for the next event.", labels=['topic'])
+        for topic, ring in get_event_bus().rings.items():
+            buffered.add_metric([topic], len(ring))
+            waiting.add_metric([topic], ring.waiting)
+        yield buffered
+        yield waiting
+
+        yield GaugeMetricFamily(
+            'ctf_fragment_cache_size', "Characters of pre-rendered question HTML cached.",
+            value=question_fragments.size,
+        )
+        for key in ('hits', 'misses'):
+            # Counters, so rate() copes with worker restarts; exposed with a _total suffix
+            yield CounterMetricFamily(
+                f'ctf_fragment_cache_{key}', f"Question fragment cache {key} since start.",
+                value=getattr(question_fragments, key),
+            )
+
+        stats = led_worker.stats()
+        yield GaugeMetricFamily('ctf_led_queue_depth', "LED commands waiting to be played.", value=stats['queue_depth'])
+        for key in ('dropped', 'stale', 'coalesced'):
+            yield CounterMetricFamily(f'ctf_led_{key}', f"LED commands {key} since start.", value=stats[key])
+        latency = GaugeMetricFamily(
+            'ctf_led_latency_seconds', "Recent time from LED command to first packet.", labels=['quantile'],
+        )
+        for quantile in ('p50', 'p95'):
+            if stats[f'latency_{quantile}'] is not None:
+                latency.add_metric([quantile], stats[f'latency_{quantile}'])
+        yield latency
+
+
+REGISTRY.register(LiveStateCollector())
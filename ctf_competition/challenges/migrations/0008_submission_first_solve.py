@@ -0,0 +1,39 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_first_solves(apps, schema_editor):
+    """Flag the earliest correct submission of every (user, question) pair."""
+    Submission = apps.get_model('challenges', 'Submission')
+    seen = set()
+    first_ids = []
+    correct = Submission.objects.filter(is_correct=True).order_by('timestamp', 'id')
+    for pk, user_id, question_id in correct.values_list('id', 'user_id', 'question_id').iterator():
+        if (user_id, question_id) not in seen:
+            seen.add((user_id, question_id))
+            first_ids.append(pk)
+    for start in range(0, len(first_ids), 1000):
+        Submission.objects.filter(id__in=first_ids[start:start + 1000]).update(first_solve=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0007_liveevent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='first_solve',
+            field=models.BooleanField(default=None, editable=False, null=True),
+        ),
+        migrations.RunPython(mark_first_solves, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='submission',
+            constraint=models.UniqueConstraint(fields=('user', 'question', 'first_solve'), name='unique_solve_per_question'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0008_submission_first_solve'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='alternate_answers',
+            field=models.TextField(blank=True, default='', help_text='Other accepted answers, one per line'),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='answer_mode',
+            field=models.CharField(choices=[('normalized', 'Ignore case and extra whitespace'), ('exact', 'Exact match'), ('regex', 'Regular expressions')], default='normalized', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='flag_prefix',
+            field=models.CharField(blank=True, default='', help_text='e.g. "CTF" to accept both "CTF{answer}" and the bare answer', max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0009_question_answer_matching'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=100, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0010_question_slug'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='current_points',
+            field=models.IntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='decay',
+            field=models.PositiveIntegerField(default=0, help_text='Solves after which the value reaches minimum_points'),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='dynamic_scoring',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='minimum_points',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def create_missing_scores(apps, schema_editor):
+    # New accounts get theirs from challenges.scoring.create_player_score
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    PlayerScore = apps.get_model('challenges', 'PlayerScore')
+    missing = User.objects.filter(playerscore__isnull=True).values_list('id', flat=True)
+    PlayerScore.objects.bulk_create([PlayerScore(user_id=user_id) for user_id in missing], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0011_question_dynamic_scoring'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_scores, migrations.RunPython.noop),
+    ]
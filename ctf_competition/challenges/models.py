@@ -1,3 +1,6 @@
+import re
+
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils.timezone import now
@@ -36,10 +39,24 @@ class Question(models.Model):
         ('Other', 'Other'),
     ]
 
+    ANSWER_MODE_CHOICES = [
+        ('normalized', 'Ignore case and extra whitespace'),
+        ('exact', 'Exact match'),
+        ('regex', 'Regular expressions'),
+    ]
+
+    # Stable key used by import_questions to match a pack's entries to existing rows
+    slug = models.SlugField(max_length=100, unique=True, null=True, blank=True)
     title = models.CharField(max_length=255)
     description = models.TextField()
     points = models.IntegerField(default=100)
     answer = models.CharField(max_length=255)  # Correct answer
+    alternate_answers = models.TextField(blank=True, default='', help_text="Other accepted answers, one per line")
+    answer_mode = models.CharField(max_length=20, choices=ANSWER_MODE_CHOICES, default='normalized')
+    flag_prefix = models.CharField(
+        max_length=20, blank=True, default='',
+        help_text='e.g. "CTF" to accept both "CTF{answer}" and the bare answer',
+    )
     category = models.CharField(max_length=50, choices=CATEGORY_CHOICES, default='Other')
     is_multiple_choice = models.BooleanField(default=False)
     option_1 = models.CharField(max_length=255, blank=True, null=True)
@@ -49,9 +66,33 @@ class Question(models.Model):
 
     max_attempts = models.PositiveIntegerField(default=1)
 
+    # Dynamic scoring: the question is worth ``points`` to its first solver and
+    # decays towards ``minimum_points`` as more players solve it. Every solver
+    # holds the current value, which challenges.scoring keeps in current_points.
+    dynamic_scoring = models.BooleanField(default=False)
+    minimum_points = models.PositiveIntegerField(default=0)
+    decay = models.PositiveIntegerField(default=0, help_text="Solves after which the value reaches minimum_points")
+    current_points = models.IntegerField(null=True, editable=False)
+
     def __str__(self):
         return self.title
 
+    @property
+    def value(self):
+        """Points a solver currently holds for this question."""
+        # current_points is left behind when an admin turns dynamic scoring off
+        if self.dynamic_scoring and self.current_points is not None:
+            return self.current_points
+        return self.points
+
+    def clean(self):
+        from .answers import AnswerMatcher
+
+        try:
+            AnswerMatcher(self.answer, self.alternate_answers, self.answer_mode, self.flag_prefix)
+        except re.error as exc:
+            raise ValidationError({'answer_mode': f"Invalid regular expression: {exc}"})
+
     def is_valid_option(self, submitted_answer):
         """Check if the submitted answer matches one of the valid options (for MCQs)."""
         options = [self.option_1, self.option_2, self.option_3, self.option_4]
@@ -63,6 +104,16 @@ class Submission(models.Model):
     submitted_answer = models.CharField(max_length=255)
     is_correct = models.BooleanField(default=False)
     timestamp = models.DateTimeField(auto_now_add=True)
+    # True on the submission that solved the question and NULL on every other
+    # one, so the unique constraint below allows a single solve per player.
+    first_solve = models.BooleanField(null=True, default=None, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'question', 'first_solve'], name='unique_solve_per_question'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.question.title} - {'Correct' if self.is_correct else 'Wrong'}"
@@ -73,3 +124,12 @@ class PlayerScore(models.Model):
 
     def __str__(self):
         return f"{self.user.username}: {self.score}"
+
+class LiveEvent(models.Model):
+    """Outbox of live events, tailed by every worker when DatabaseEventBus is in use."""
+    topic = models.CharField(max_length=20)
+    payload = models.JSONField()
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"#{self.id} {self.topic}"
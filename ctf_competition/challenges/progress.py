@@ -0,0 +1,91 @@
+from django.db.models import Count, Q
+
+from . import fragments
+from .catalog import question_catalog
+from .models import Submission
+
+
+AVAILABLE = 'available'
+COMPLETED = 'completed'
+EXHAUSTED = 'exhausted'
+
+
+class QuestionProgress:
+    """
+    A catalog entry together with one player's attempts on it: the per-player
+    overlay around the question's pre-rendered fragments.
+    """
+
+    def __init__(self, question, attempts=0, solves=0):
+        self.question = question
+        self.attempts = attempts
+        self.solves = solves
+        self.attempts_left = max(question.max_attempts - attempts, 0)
+
+    def __getattr__(self, name):
+        return getattr(self.question, name)
+
+    @property
+    def status(self):
+        if self.solves:
+            return COMPLETED
+        return EXHAUSTED if self.attempts_left == 0 else AVAILABLE
+
+    @property
+    def card_html(self):
+        return fragments.card(self.question, self.status)
+
+    @property
+    def description_html(self):
+        return fragments.description(self.question)
+
+    @property
+    def inputs_html(self):
+        return fragments.answer_inputs(self.question)
+
+
+def user_progress(user, question_ids=None):
+    """
+    Return ``{question_id: (attempts, solves)}`` for the user's submissions in
+    one grouped query. Questions the user never tried are absent.
+    """
+    submissions = Submission.objects.filter(user=user)
+    if question_ids is not None:
+        submissions = submissions.filter(question_id__in=question_ids)
+    rows = submissions.values('question_id').annotate(
+        attempts=Count('id'),
+        solves=Count('id', filter=Q(is_correct=True)),
+    ).values_list('question_id', 'attempts', 'solves')
+    return {question_id: (attempts, solves) for question_id, attempts, solves in rows}
+
+
+def split_by_status(questions, progress):
+    """Sort questions into ``(available, completed, exhausted)`` lists of QuestionProgress."""
+    by_status = {AVAILABLE: [], COMPLETED: [], EXHAUSTED: []}
+    for question in questions:
+        item = QuestionProgress(question, *progress.get(question.id, (0, 0)))
+        by_status[item.status].append(item)
+    return by_status[AVAILABLE], by_status[COMPLETED], by_status[EXHAUSTED]
+
+
+def category_progress(user, category):
+    """Return ``(available, completed, exhausted)`` for one category."""
+    questions = question_catalog.get().category(category)
+    if not questions:
+        return [], [], []
+    return split_by_status(questions, user_progress(user, [question.id for question in questions]))
+
+
+def progress_by_category(user):
+    """Return ``{category: (available, completed, exhausted)}`` for every category."""
+    catalog = question_catalog.get()
+    progress = user_progress(user)
+    return {
+        category: split_by_status(questions, progress)
+        for category, questions in catalog.by_category.items()
+    }
+
+
+def question_progress(user, question):
+    """QuestionProgress for a single question (entry or detail)."""
+    return QuestionProgress(question, *user_progress(user, [question.id]).get(question.id, (0, 0)))
@@ -0,0 +1,158 @@
+"""
+Token-bucket rate limiting for views that players can hammer with scripts.
+
+``rate_limit`` is applied outermost, before ``login_required``, and keys its
+buckets on the logged-in user's id, read from the session, or on the session
+cookie when nobody is logged in. The User row is never loaded, and with the
+cached_db session engine the session read is a cache hit, so a rejected
+request is answered with a 429 and a ``Retry-After`` header without running
+a query.
+
+A per-address limit is opt-in (``'IP'`` in ``CHALLENGES_RATE_LIMIT``): at an
+onsite event behind one NAT, or behind a reverse proxy, every player would
+otherwise share a single bucket. Behind a proxy, list its addresses in
+``'TRUSTED_PROXIES'`` so the client is read from ``X-Forwarded-For``.
+
+The bucket table lives behind the ``CHALLENGES_RATE_LIMIT`` setting:
+
+* ``InMemoryRateLimiter`` keeps buckets in a dict in this process and evicts
+  the ones that have refilled completely. Limits are per worker.
+* ``CacheRateLimiter`` stores buckets in a Django cache so every worker sees
+  the same limits. Updates are read-then-write, so concurrent requests on
+  different workers can slip a few extra tokens through.
+"""
+import math
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+from .metrics import RATE_LIMITED
+
+
+class InMemoryRateLimiter:
+    sweep_interval = 60  # Seconds between passes that drop refilled buckets
+
+    def __init__(self):
+        self._buckets = {}  # key -> (tokens, updated, seconds until full)
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def take(self, key, capacity, period):
+        """
+        Take one token from ``key``'s bucket, which holds ``capacity`` tokens
+        and refills completely over ``period`` seconds. Returns 0 when allowed,
+        otherwise the seconds until a token is available.
+        """
+        now = time.monotonic()
+        rate = capacity / period
+        with self._lock:
+            if now - self._last_sweep > self.sweep_interval:
+                self._sweep(now)
+            tokens, updated, _ = self._buckets.get(key, (capacity, now, 0))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now, (capacity - tokens) / rate)
+                return (1 - tokens) / rate
+            tokens -= 1
+            self._buckets[key] = (tokens, now, (capacity - tokens) / rate)
+            return 0
+
+    def _sweep(self, now):
+        self._buckets = {
+            key: bucket for key, bucket in self._buckets.items() if now - bucket[1] < bucket[2]
+        }
+        self._last_sweep = now
+
+
+class CacheRateLimiter:
+    def __init__(self, cache='default', prefix='ratelimit'):
+        self.cache = caches[cache]
+        self.prefix = prefix
+
+    def take(self, key, capacity, period):
+        now = time.time()
+        rate = capacity / period
+        cache_key = f'{self.prefix}:{key}'
+        tokens, updated = self.cache.get(cache_key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self.cache.set(cache_key, (tokens, now), timeout=math.ceil((capacity - tokens) / rate) + 1)
+        return 0 if allowed else (1 - tokens) / rate
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Return the process-wide limiter configured by ``CHALLENGES_RATE_LIMIT``."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                config = getattr(settings, 'CHALLENGES_RATE_LIMIT', {})
+                backend = import_string(config.get('BACKEND', 'challenges.ratelimit.InMemoryRateLimiter'))
+                _limiter = backend(**config.get('OPTIONS', {}))
+    return _limiter
+
+
+def client_ip(request, trusted_proxies=()):
+    """
+    The client's address: ``REMOTE_ADDR``, unless that is a trusted proxy, in
+    which case the nearest ``X-Forwarded-For`` hop that is not one.
+    """
+    address = request.META.get('REMOTE_ADDR')
+    if address in trusted_proxies:
+        for hop in reversed(request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')):
+            address = hop.strip() or address
+            if address not in trusted_proxies:
+                break
+    return address
+
+
+def client_key(request):
+    """``user:<id>`` for a logged-in session, ``session:<key>`` for any other session cookie, else None."""
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not session_key:
+        return None
+    user_id = request.session.get(SESSION_KEY)
+    return f'user:{user_id}' if user_id is not None else f'session:{session_key}'
+
+
+def rate_limit(scope, user=(10, 60)):
+    """
+    Limit a view to ``user = (requests, seconds)`` per logged-in user (per
+    session cookie before login). Requests without a session cookie are
+    only limited by the optional per-address limit from settings.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapped(request, *args, **kwargs):
+            limiter = get_rate_limiter()
+            config = getattr(settings, 'CHALLENGES_RATE_LIMIT', {})
+            retry_after = 0
+            key = client_key(request) if user is not None else None
+            if key is not None:
+                retry_after = limiter.take(f'{scope}:{key}', *user)
+            if not retry_after and config.get('IP') is not None:
+                address = client_ip(request, config.get('TRUSTED_PROXIES', ()))
+                retry_after = limiter.take(f'{scope}:ip:{address}', *config['IP'])
+            if retry_after:
+                RATE_LIMITED.labels(scope).inc()
+                response = HttpResponse("Too many requests, slow down.", status=429, content_type='text/plain')
+                response['Retry-After'] = str(math.ceil(retry_after))
+                return response
+            return view_func(request, *args, **kwargs)
+        return wrapped
+    return decorator
@@ -0,0 +1,131 @@
+import asyncio
+import json
+import logging
+
+from .competition import competition_state, timer_payload
+from .leaderboard import leaderboard
+from .streams import run_detached
+
+logger = logging.getLogger(__name__)
+
+
+class ScoreboardPublisher:
+    """
+    Builds one scoreboard body per tick and fans the same text out to every
+    connected stream, instead of each client querying the database itself.
+    Rows come from the in-memory leaderboard, so a tick normally runs no query.
+
+    Bodies are either a full ``snapshot`` or a ``diff`` against the previous
+    version, and carry the timer state and deadline so the page can count
+    down locally. A subscriber that is exactly one version behind gets the diff;
+    anyone else (new connections, slow readers) gets the latest snapshot.
+
+    Streams (see challenges.live) ``attach`` an asyncio.Event that is set on
+    every new version and read the JSON bodies with ``body_for``.
+    """
+
+    interval = 1  # Seconds between refreshes
+    diff_threshold = 0.5  # Send a full snapshot once more than this share of rows moved
+    backoff_max = 30  # Longest pause between refreshes while they keep failing
+
+    def __init__(self):
+        self.version = 0
+        self.rows = []
+        self.timer = None
+        self.snapshot_body = None
+        self.latest_body = None
+        self.subscribers = 0
+        self._waiters = set()
+        self._wakeup = None
+        self._task = None
+
+    def notify(self):
+        """Ask for a refresh before the next tick (safe to call from any thread)."""
+        if self._task is not None and not self._task.done():
+            self._task.get_loop().call_soon_threadsafe(self._wakeup.set)
+
+    def attach(self, waiter):
+        """Count a subscriber and set the asyncio.Event ``waiter`` on every new version."""
+        self._ensure_running()
+        self.subscribers += 1
+        self._waiters.add(waiter)
+
+    def detach(self, waiter):
+        self._waiters.discard(waiter)
+        self.subscribers -= 1
+
+    def body_for(self, seen):
+        """JSON of the frame to send a subscriber that last saw version ``seen``."""
+        return self.latest_body if seen and self.version == seen + 1 else self.snapshot_body
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        delay = self.interval
+        while True:
+            try:
+                await self._refresh()
+                delay = self.interval
+            except Exception:
+                # Keep serving the last frame; dying here would freeze every open scoreboard
+                logger.exception("Scoreboard refresh failed, retrying in %ss", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.backoff_max)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not self.subscribers:
+                self._task = None
+                return
+
+    async def _refresh(self):
+        rows = await run_detached(self._rows)  # Only the first call after a reset loads from the database
+        timer = timer_payload(await competition_state.asnapshot())
+
+        if self.snapshot_body is not None and rows == self.rows and timer == self.timer:
+            return  # Nothing changed, skip the frame
+
+        changed = [
+            [index, *row] for index, row in enumerate(rows)
+            if index >= len(self.rows) or self.rows[index] != row
+        ]
+        self.version += 1
+        snapshot = {
+            'type': 'snapshot',
+            'version': self.version,
+            'scores': [{'username': username, 'score': score} for username, score in rows],
+            'timer': timer,
+        }
+        self.snapshot_body = encode_json(snapshot)
+        if self.version > 1 and len(changed) <= len(rows) * self.diff_threshold:
+            self.latest_body = encode_json({
+                'type': 'diff',
+                'version': self.version,
+                'length': len(rows),
+                'changed': changed,
+                'timer': timer,
+            })
+        else:
+            self.latest_body = self.snapshot_body
+        self.rows = rows
+        self.timer = timer
+
+        for waiter in self._waiters:
+            waiter.set()
+
+
+    @staticmethod
+    def _rows():
+        return [[row['username'], row['score']] for row in leaderboard.top(len(leaderboard))]
+
+
+def encode_json(data):
+    return json.dumps(data, separators=(',', ':'))
+
+
+publisher = ScoreboardPublisher()
@@ -0,0 +1,172 @@
+"""
+Scoring engine.
+
+``PlayerScore.score`` is a denormalised total kept up to date incrementally
+by ``record_submission`` and ``reprice``. ``expected_scores`` recomputes
+every total from the solves themselves (Submission.first_solve) so the
+counters can be verified and repaired.
+
+Dynamic questions decay from ``points`` towards ``minimum_points`` over
+``decay`` solves, and every solver holds the current value. When a solve
+lowers the value, ``reprice`` runs after the solve commits and shifts the
+totals of that question's solvers by the difference in one UPDATE, rather
+than recomputing every player.
+
+A reprice is broadcast with the question's new value and its solvers' new
+totals, so every process moves just those players on its leaderboard and
+changes just that question in its catalog, without reading the database.
+
+Lock order: a correct answer to a dynamic question locks the Question row
+before the player's PlayerScore row, and ``reprice`` locks the Question row
+before touching any PlayerScore. Other submissions do not lock the Question,
+but on InnoDB inserting their Submission takes a shared lock on it through
+the foreign key while the player's PlayerScore is held. Such a submission
+can therefore still deadlock with a reprice or ``repair`` holding that
+Question and waiting for its PlayerScore. InnoDB then rolls one of them back,
+and record_submission, reprice and reconcile_scores run it again (see
+submissions.retry_on_lock_conflict).
+"""
+import math
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Sum, Value, When
+
+from .models import PlayerScore, Question, Submission
+
+
+def question_value(points, minimum_points, decay, solves):
+    """
+    Value of a dynamic question with ``solves`` solvers: full ``points`` for
+    the first, falling along a parabola to ``minimum_points`` at ``decay``.
+    """
+    if not decay or solves <= 1:
+        return points
+    value = (minimum_points - points) / (decay ** 2) * (solves - 1) ** 2 + points
+    return max(minimum_points, math.ceil(value))
+
+
+def dynamic_values():
+    """``{question_id: value}`` every solver of each dynamic question should hold, from one grouped query."""
+    rows = Question.objects.filter(dynamic_scoring=True).annotate(
+        solves=Count('submission', filter=Q(submission__first_solve=True)),
+    ).values_list('id', 'points', 'minimum_points', 'decay', 'solves')
+    return {
+        question_id: question_value(points, minimum, decay, solves)
+        for question_id, points, minimum, decay, solves in rows
+    }
+
+
+def expected_scores(values=None):
+    """``{user_id: total}`` recomputed from every solve in one aggregate query."""
+    values = dynamic_values() if values is None else values
+    points = Case(
+        *[When(question_id=question_id, then=Value(value)) for question_id, value in values.items()],
+        default=F('question__points'),
+        output_field=IntegerField(),
+    )
+    rows = Submission.objects.filter(first_solve=True).values('user_id').annotate(total=Sum(points)).values_list(
+        'user_id', 'total',
+    )
+    return dict(rows)
+
+
+def verify():
+    """
+    Compare stored totals with recomputed ones. Returns ``(mismatches,
+    values)`` where ``mismatches`` is ``[(user_id, stored or None,
+    expected)]``.
+    """
+    values = dynamic_values()
+    expected = expected_scores(values)
+    stored = dict(PlayerScore.objects.values_list('user_id', 'score'))
+    mismatches = [
+        (user_id, stored.get(user_id), total)
+        for user_id, total in expected.items() if stored.get(user_id) != total
+    ]
+    mismatches += [(user_id, score, 0) for user_id, score in stored.items() if user_id not in expected and score]
+    return mismatches, values
+
+
+def repair(batch_size=1000):
+    """Rewrite every wrong total and every dynamic question's current value. Returns the mismatches fixed."""
+    with transaction.atomic():
+        # Hold the dynamic questions so no solve or reprice lands mid-repair
+        list(Question.objects.select_for_update().filter(dynamic_scoring=True).values_list('id'))
+        mismatches, values = verify()
+        stored = {
+            score.user_id: score
+            for score in PlayerScore.objects.filter(user_id__in=[user_id for user_id, _, _ in mismatches])
+        }
+        to_update, to_create = [], []
+        for user_id, _, expected in mismatches:
+            if user_id in stored:
+                stored[user_id].score = expected
+                to_update.append(stored[user_id])
+            else:
+                to_create.append(PlayerScore(user_id=user_id, score=expected))
+        PlayerScore.objects.bulk_update(to_update, ['score'], batch_size=batch_size)
+        PlayerScore.objects.bulk_create(to_create, batch_size=batch_size)
+
+        repriced = Question.objects.filter(dynamic_scoring=False, current_points__isnull=False).update(
+            current_points=None,
+        )
+        dynamic = Question.objects.filter(dynamic_scoring=True)
+        for question_id, current in dynamic.values_list('id', 'current_points'):
+            if current != values[question_id]:
+                repriced += Question.objects.filter(pk=question_id).update(current_points=values[question_id])
+        if mismatches or repriced:
+            publish_rescore()
+    return mismatches
+
+
+def create_player_score(sender, instance, created, raw=False, **kwargs):
+    """
+    post_save receiver for User: every account gets its PlayerScore row when
+    it is made, so record_submission only ever locks a row that exists.
+    """
+    if created and not raw:
+        PlayerScore.objects.get_or_create(user=instance)
+
+
+def reprice(question_id):
+    """
+    Bring a dynamic question's value in line with its solve count and shift
+    its solvers' totals by the change. Returns the number of players updated.
+    """
+    with transaction.atomic():
+        question = Question.objects.select_for_update().only(
+            'points', 'dynamic_scoring', 'minimum_points', 'decay', 'current_points',
+        ).get(pk=question_id)
+        if not question.dynamic_scoring:
+            return 0
+        solvers = Submission.objects.filter(question_id=question_id, first_solve=True)
+        target = question_value(question.points, question.minimum_points, question.decay, solvers.count())
+        delta = target - question.value
+        if not delta:
+            return 0
+        solver_scores = PlayerScore.objects.filter(user_id__in=solvers.values('user_id'))
+        updated = solver_scores.update(score=F('score') + delta)
+        Question.objects.filter(pk=question_id).update(current_points=target)
+        publish_rescore(question_id, target, list(
+            solver_scores.filter(user__is_staff=False, user__is_superuser=False).values_list('user_id', 'score')
+        ))
+    return updated
+
+
+def publish_rescore(question_id=None, value=None, scores=()):
+    """
+    Tell every process that many totals changed at once. For a reprice of
+    ``question_id`` that is its new ``value`` and its players' ``scores``
+    (``(user_id, score)`` pairs, staff left out); with no question, anyone's
+    total and any question's value may have changed.
+    """
+    from .catalog import question_changed
+    from .eventbus import get_event_bus
+
+    bus = get_event_bus()
+    if question_id is None:
+        bus.publish('score', {'rescored': True, 'question_id': None})
+        question_changed(Question)
+    else:
+        bus.publish('score', {'rescored': True, 'question_id': question_id, 'scores': [list(row) for row in scores]})
+        bus.publish('catalog', {'question_id': question_id, 'value': value})
@@ -0,0 +1,69 @@
+"""
+Keeping long-lived async streams off per-request threads.
+
+Under ASGI, Django runs every request inside an asgiref
+ThreadSensitiveContext. The first thread-sensitive ``sync_to_async`` call
+in it starts a single-thread executor that lives until the response has been
+sent, and every MiddlewareMixin middleware makes such a call. For an SSE
+stream the response lasts as long as the connection, so each open dashboard
+used to pin an idle thread, and the DB connection opened on it, for the
+whole event.
+
+``detach_from_request`` wraps a stream so that once the view and middleware
+have finished and streaming begins, the request's executor closes its DB
+connections and shuts down. From then on streams read in-memory state and
+reach the database only through ``run_detached``, which borrows a thread
+from the event loop's shared default executor.
+
+Releasing the executor relies on two asgiref internals; ``check_asgiref``
+runs at startup so an asgiref upgrade that drops them stops the server
+instead of silently pinning a thread per stream again.
+"""
+from contextlib import aclosing
+from contextvars import ContextVar
+
+from asgiref.sync import SyncToAsync, sync_to_async
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+
+
+def check_asgiref():
+    """Raise ImproperlyConfigured unless SyncToAsync has the internals ``release_request_thread`` uses."""
+    context = getattr(SyncToAsync, 'thread_sensitive_context', None)
+    executors = getattr(SyncToAsync, 'context_to_thread_executor', None)
+    if not isinstance(context, ContextVar) or not hasattr(executors, 'pop'):
+        raise ImproperlyConfigured(
+            "This asgiref version lacks SyncToAsync.thread_sensitive_context or "
+            "SyncToAsync.context_to_thread_executor, which challenges.streams needs to release "
+            "request threads; pin asgiref to a version that has them (3.3 to 3.12 do)."
+        )
+
+
+def release_request_thread():
+    """Shut down the thread-sensitive executor of the current request, if one was started."""
+    context = SyncToAsync.thread_sensitive_context.get(None)
+    if context is None:
+        return  # Not under ASGIHandler, e.g. the test client
+    executor = SyncToAsync.context_to_thread_executor.pop(context, None)
+    if executor is not None:
+        executor.submit(connections.close_all)
+        executor.shutdown(wait=False)
+
+
+async def detach_from_request(stream):
+    """Release the request's thread before the first frame of ``stream``, then pass frames through."""
+    release_request_thread()
+    async with aclosing(stream):
+        async for frame in stream:
+            yield frame
+
+
+async def run_detached(func, *args):
+    """Run blocking ``func`` in the loop's shared executor and close any DB connection it opened there."""
+    def call():
+        try:
+            return func(*args)
+        finally:
+            connections.close_all()
+
+    return await sync_to_async(call, thread_sensitive=False)()
@@ -0,0 +1,106 @@
+import random
+import time
+
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.db.models import Count, F, Q
+
+from .models import PlayerScore, Question, Submission
+from .scoring import reprice
+
+CORRECT = 'correct'
+INCORRECT = 'incorrect'
+ALREADY_SOLVED = 'already'
+EXHAUSTED = 'exhausted'
+
+LOCK_RETRIES = 8  # Attempts at a submission that keeps losing lock conflicts before the error surfaces
+
+
+def record_submission(user, question, answer, is_correct):
+    """
+    Record one answer to ``question`` and award its points, as a single atomic unit.
+
+    The player's PlayerScore row is locked first, which serialises concurrent
+    submissions from the same player, so the attempt count and the solved check
+    cannot be raced past. The score is incremented in the database with F()
+    rather than read-modify-written in Python, and the unique constraint on
+    Submission.first_solve stops a question from being awarded twice even on
+    backends where the row lock is a no-op.
+
+    The row exists before the lock is taken (scoring.create_player_score makes
+    it with the account), so the locked section never inserts one: on InnoDB a
+    locking read of a missing row takes a gap lock that two first submissions
+    would deadlock on. A transaction that still loses a lock conflict (an
+    InnoDB deadlock, or SQLite's "database is locked" when a deferred
+    transaction cannot upgrade to a write) is rolled back and run again.
+
+    Returns ``(outcome, submission, score)``, where ``outcome`` is one of
+    CORRECT, INCORRECT, ALREADY_SOLVED or EXHAUSTED. ``submission`` is None
+    when nothing was recorded.
+    """
+    try:
+        outcome, submission, score = retry_on_lock_conflict(_record_submission, user, question, answer, is_correct)
+    except PlayerScore.DoesNotExist:
+        # An account bulk-created without one: make it outside the locked section and go again
+        PlayerScore.objects.get_or_create(user=user)
+        outcome, submission, score = retry_on_lock_conflict(_record_submission, user, question, answer, is_correct)
+    if score is None:
+        # A dynamic solve: read back after reprice has run so the caller broadcasts the settled total
+        score = PlayerScore.objects.values_list('score', flat=True).get(user=user)
+    return outcome, submission, score
+
+
+def retry_on_lock_conflict(func, *args):
+    """Call ``func``, one whole transaction, again for as long as it loses lock conflicts."""
+    for attempt in range(LOCK_RETRIES):
+        try:
+            return func(*args)
+        except OperationalError as exc:
+            # Inside an outer transaction only the caller can roll back far enough to retry
+            if attempt == LOCK_RETRIES - 1 or connection.in_atomic_block or not is_lock_conflict(exc):
+                raise
+            time.sleep(random.uniform(0, 0.005 * 2 ** attempt))
+
+
+def is_lock_conflict(exc):
+    """True for errors meaning another transaction got in the way and this one may simply run again."""
+    code = exc.args[0] if exc.args else None
+    # MySQL lock wait timeout and deadlock, SQLite busy, PostgreSQL deadlock
+    return code in (1205, 1213) or 'database is locked' in str(exc) or 'deadlock detected' in str(exc)
+
+
+def _record_submission(user, question, answer, is_correct):
+    dynamic = is_correct and question.dynamic_scoring
+    with transaction.atomic():
+        if dynamic:
+            # Locked before the player's row, in the order scoring.reprice relies on
+            question = Question.objects.select_for_update().get(pk=question.pk)
+        player_score = PlayerScore.objects.select_for_update().get(user=user)
+
+        stats = Submission.objects.filter(user=user, question=question).aggregate(
+            attempts=Count('id'),
+            solved=Count('id', filter=Q(is_correct=True)),
+        )
+        if stats['attempts'] >= question.max_attempts:
+            return EXHAUSTED, None, player_score.score
+        if stats['solved']:
+            return ALREADY_SOLVED, None, player_score.score
+
+        fields = {'user': user, 'question': question, 'submitted_answer': answer, 'is_correct': is_correct}
+        if not is_correct:
+            # first_solve stays NULL, which the unique constraint never matches, so no savepoint is needed
+            return INCORRECT, Submission.objects.create(**fields), player_score.score
+        try:
+            with transaction.atomic():
+                submission = Submission.objects.create(**fields, first_solve=True)
+        except IntegrityError:
+            return ALREADY_SOLVED, None, player_score.score
+
+        # A dynamic question is awarded at the value every earlier solver holds;
+        # reprice then moves all of them, this player included, to the new value.
+        points = question.value
+        PlayerScore.objects.filter(pk=player_score.pk).update(score=F('score') + points)
+        if not dynamic:
+            return CORRECT, submission, player_score.score + points
+        # Robust: the solve has committed whatever happens now, and reconcile_scores --repair mends a lost reprice
+        transaction.on_commit(lambda: retry_on_lock_conflict(reprice, question.pk), robust=True)
+    return CORRECT, submission, None
@@ -1,3 +1,595 @@
-from django.test import TestCase
+import asyncio
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import SyncToAsync
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils.timezone import now
+
+from challenges import export, led_controller, ratelimit
+from challenges.catalog import question_catalog
+from challenges.competition import TimerSnapshot, competition_state
+from challenges.eventbus import DatabaseEventBus
+from challenges.leaderboard import leaderboard
+from challenges.live import sse_events
+from challenges.models import ChallengeTimer, PlayerScore, Question, Submission
+from challenges.scoreboard import ScoreboardPublisher
+from challenges.scoring import question_value, repair, verify
+from challenges.streams import check_asgiref
+from challenges.submissions import ALREADY_SOLVED, CORRECT, EXHAUSTED, INCORRECT, record_submission
+
+
+def start_competition():
+    """
+    Start an hour-long timer and drop the per-process caches, which inside a
+    TestCase never see the on_commit events that would normally reset them.
+    """
+    ChallengeTimer.objects.create(start_time=now(), duration=timedelta(hours=1))
+    competition_state.invalidate()
+    question_catalog.invalidate()
+    leaderboard.reset()
+    ratelimit._limiter = None  # Fresh in-memory buckets
+
+
+class ASGIConnection:
+    """One HTTP request driven through an ASGI application, kept open until ``disconnect``."""
+
+    def __init__(self, application, path, cookie):
+        self.started = asyncio.Event()
+        self.status = None
+        self._requested = False
+        self._closed = asyncio.Event()
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+            'headers': [(b'host', b'testserver'), (b'cookie', cookie.encode())],
+            'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+        }
+        self.task = asyncio.create_task(application(scope, self.receive, self.send))
+
+    async def receive(self):
+        if not self._requested:
+            self._requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self._closed.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        if message['type'] == 'http.response.start':
+            self.status = message['status']
+            self.started.set()
+
+    async def disconnect(self):
+        self._closed.set()
+        await self.task
+
+
+class StreamThreadTests(TransactionTestCase):
+    streams = 300
+    paths = [
+        '/challenges/scoreboard/stream/',
+        '/challenges/timer/stream/',
+        '/challenges/submissions/stream/',
+        '/challenges/live/',
+    ]
+
+    def test_open_streams_do_not_hold_threads(self):
+        staff = User.objects.create_user('staff', is_staff=True)
+        self.client.force_login(staff)
+        cookie = f"{settings.SESSION_COOKIE_NAME}={self.client.cookies[settings.SESSION_COOKIE_NAME].value}"
+        # Run the loop on this thread, outside async_to_sync, so each request gets its own
+        # ThreadSensitiveContext exactly as under a real ASGI server
+        asyncio.run(self.open_streams(cookie))
+
+    async def open_streams(self, cookie):
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=4))
+        application = ASGIHandler()
+        baseline = threading.active_count()
+
+        connections = [
+            ASGIConnection(application, self.paths[i % len(self.paths)], cookie) for i in range(self.streams)
+        ]
+        await asyncio.wait_for(asyncio.gather(*(connection.started.wait() for connection in connections)), 60)
+        await asyncio.sleep(0.5)  # Let every stream reach its first wait
+        opened = threading.active_count()
+
+        await asyncio.wait_for(asyncio.gather(*(connection.disconnect() for connection in connections)), 60)
+        self.assertEqual({connection.status for connection in connections}, {200})
+        # Only the shared default executor may add threads, however many streams are open
+        self.assertLessEqual(opened - baseline, 4 + 2)
+
+    def test_asgiref_still_has_the_internals_streams_use(self):
+        check_asgiref()  # Fails here first when an asgiref upgrade renames them
+        for name in ('thread_sensitive_context', 'context_to_thread_executor'):
+            with self.subTest(name), mock.patch.object(SyncToAsync, name, None):
+                with self.assertRaises(ImproperlyConfigured):
+                    check_asgiref()
+
+
+class SSEEventsTests(SimpleTestCase):
+    class Subscription:
+        async def events(self):
+            yield 'submissions', '{"status":"correct"}', 7
+            yield 'lagged', '{"resumed_from":3}', None
+            yield None, None, None
+
+    def frames(self, **kwargs):
+        async def collect():
+            return [frame async for frame in sse_events(self.Subscription(), **kwargs)]
+        return asyncio.run(collect())
+
+    def test_live_stream_names_every_event(self):
+        self.assertEqual(self.frames(), [
+            b'id: 7\nevent: submissions\ndata: {"status":"correct"}\n\n',
+            b'event: lagged\ndata: {"resumed_from":3}\n\n',
+            b': keepalive\n\n',
+        ])
+
+    def test_single_stream_endpoints_send_their_stream_unnamed(self):
+        self.assertEqual(self.frames(unnamed={'submissions'}), [
+            b'id: 7\ndata: {"status":"correct"}\n\n',
+            b'event: lagged\ndata: {"resumed_from":3}\n\n',
+            b': keepalive\n\n',
+        ])
+
+
+class LedWorkerTests(SimpleTestCase):
+    def test_concurrent_first_sends_wait_for_the_loop(self):
+        transport = led_controller.FakeTransport()
+        worker = led_controller.LedWorker(transport)
+        worker.coalesce_window = 0
+        barrier = threading.Barrier(20)
+        errors = []
+
+        def send():
+            barrier.wait()
+            try:
+                worker.send('red_strobe')
+            except Exception as exc:
+                errors.append(exc)
+
+        def slow_new_event_loop(new_event_loop=asyncio.new_event_loop):
+            time.sleep(0.1)  # Widen the window in which the thread exists but its loop does not
+            return new_event_loop()
+
+        threads = [threading.Thread(target=send) for _ in range(20)]
+        with mock.patch.object(led_controller.asyncio, 'new_event_loop', slow_new_event_loop):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(errors, [])
+
+        deadline = time.monotonic() + 5
+        while not transport.packets and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(transport.packets)
+
+    @override_settings(LED_TRANSPORT='ble')
+    def test_ble_without_bleak_falls_back_to_null_transport(self):
+        with mock.patch('importlib.util.find_spec', return_value=None), \
+                self.assertLogs('challenges.led_controller', 'WARNING'):
+            transport = led_controller.create_transport()
+        self.assertIsInstance(transport, led_controller.NullTransport)
+
+
+class ScoreboardPublisherTests(SimpleTestCase):
+    def test_refresh_errors_do_not_stop_the_publisher(self):
+        publisher = ScoreboardPublisher()
+        publisher.interval = 0.01
+        publisher._rows = mock.Mock(side_effect=[RuntimeError('database went away'), [['alice', 10]]])
+
+        async def first_frame():
+            waiter = asyncio.Event()
+            publisher.attach(waiter)
+            try:
+                await asyncio.wait_for(waiter.wait(), 5)
+            finally:
+                publisher.detach(waiter)
+
+        snapshot = mock.AsyncMock(return_value=TimerSnapshot())
+        with mock.patch.object(competition_state, 'asnapshot', snapshot), \
+                self.assertLogs('challenges.scoreboard', 'ERROR'):
+            asyncio.run(first_frame())
+        self.assertEqual(publisher.rows, [['alice', 10]])
+        self.assertEqual(publisher.version, 1)
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        self.question = Question.objects.create(title='Flood', description='', answer='flag', max_attempts=1000)
+        start_competition()
+        self.url = reverse('submit_answer', args=[self.question.id])
+
+    def test_flood_from_one_player_is_rejected_without_queries(self):
+        client = Client()
+        client.force_login(User.objects.create_user('flooder'))
+        for _ in range(10):
+            self.assertEqual(client.post(self.url, {'answer': 'guess'}).status_code, 302)
+
+        for _ in range(200):
+            with self.assertNumQueries(0):
+                response = client.post(self.url, {'answer': 'guess'})
+            self.assertEqual(response.status_code, 429)
+            self.assertTrue(int(response['Retry-After']) > 0)
+
+    def test_players_behind_one_address_do_not_share_a_bucket(self):
+        for index in range(30):
+            client = Client(REMOTE_ADDR='203.0.113.5')
+            client.force_login(User.objects.create_user(f'player{index}'))
+            for _ in range(5):
+                self.assertEqual(client.post(self.url, {'answer': 'guess'}).status_code, 302)
+
+    @override_settings(CHALLENGES_RATE_LIMIT={'IP': (3, 60), 'TRUSTED_PROXIES': ['10.0.0.1']})
+    def test_opt_in_ip_limit_reads_clients_through_trusted_proxies(self):
+        def post(forwarded_for, remote_addr='10.0.0.1'):
+            return Client(REMOTE_ADDR=remote_addr, HTTP_X_FORWARDED_FOR=forwarded_for).post(self.url).status_code
+
+        self.assertEqual([post('198.51.100.7') for _ in range(4)], [302, 302, 302, 429])
+        self.assertEqual(post('198.51.100.8'), 302)
+        # An untrusted peer cannot pick its own bucket by forging the header
+        self.assertEqual([post(f'198.51.100.{i}', remote_addr='192.0.2.9') for i in range(4)], [302, 302, 302, 429])
+
+
+class ConcurrentSubmissionTests(TransactionTestCase):
+    threads = 16
+
+    def submit_in_parallel(self, user, question, is_correct):
+        barrier = threading.Barrier(self.threads)
+        outcomes, errors = [], []
+
+        def submit():
+            try:
+                barrier.wait()
+                outcomes.append(record_submission(user, question, 'answer', is_correct)[0])
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit) for _ in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        return sorted(outcomes)
+
+    def test_parallel_correct_answers_award_points_once(self):
+        user = User.objects.create_user('racer')
+        question = Question.objects.create(
+            title='Race', description='', answer='answer', points=100, max_attempts=self.threads,
+        )
+
+        outcomes = self.submit_in_parallel(user, question, True)
+
+        self.assertEqual(outcomes, sorted([CORRECT] + [ALREADY_SOLVED] * (self.threads - 1)))
+        self.assertEqual(Submission.objects.filter(user=user, question=question, first_solve=True).count(), 1)
+        self.assertEqual(PlayerScore.objects.get(user=user).score, 100)
+
+    def test_parallel_wrong_answers_stop_at_max_attempts(self):
+        user = User.objects.create_user('guesser')
+        question = Question.objects.create(title='Guess', description='', answer='answer', max_attempts=3)
+
+        outcomes = self.submit_in_parallel(user, question, False)
+
+        self.assertEqual(outcomes, sorted([INCORRECT] * 3 + [EXHAUSTED] * (self.threads - 3)))
+        self.assertEqual(Submission.objects.filter(user=user, question=question).count(), 3)
+        self.assertEqual(PlayerScore.objects.get(user=user).score, 0)
+
+
+    def test_accounts_get_a_score_row_up_front(self):
+        user = User.objects.create_user('newcomer')
+        self.assertTrue(PlayerScore.objects.filter(user=user).exists())
+
+        # Bulk-created accounts have none; it is made outside the locked section
+        PlayerScore.objects.filter(user=user).delete()
+        question = Question.objects.create(title='Late', description='', answer='answer', points=50)
+        self.assertEqual(record_submission(user, question, 'answer', True)[::2], (CORRECT, 50))
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        leaderboard.reset()
+
+    def test_ranking_and_tie_break_order(self):
+        early, late = now() - timedelta(minutes=10), now()
+        users = {name: User.objects.create_user(name) for name in ('late', 'early', 'half', 'zero', 'zero2')}
+        leaderboard.top(10)
+        leaderboard.record_score(users['late'].id, 'late', 100, late)
+        leaderboard.record_score(users['early'].id, 'early', 100, early)
+        leaderboard.record_score(users['half'].id, 'half', 50, early)
+
+        # Score first, then the earlier last solve, then the user id
+        self.assertEqual(
+            [(row['rank'], row['username'], row['score']) for row in leaderboard.top(10)],
+            [(1, 'early', 100), (2, 'late', 100), (3, 'half', 50), (4, 'zero', 0), (5, 'zero2', 0)],
+        )
+        self.assertEqual(leaderboard.rank(users['late'].id), 2)
+        self.assertEqual([row['username'] for row in leaderboard.around(users['half'].id, 1)], ['late', 'half', 'zero'])
+
+    def test_new_players_are_ranked_at_once(self):
+        User.objects.create_user('veteran')
+        leaderboard.top(10)  # Loaded before the newcomers exist
+
+        with self.captureOnCommitCallbacks(execute=True):
+            newcomer = User.objects.create_user('newcomer')
+            User.objects.create_user('organiser', is_staff=True)
+        self.assertEqual([row['username'] for row in leaderboard.top(10)], ['veteran', 'newcomer'])
+        self.assertEqual(leaderboard.rank(newcomer.id), 2)
+
+
+class ScoringTests(TestCase):
+    def setUp(self):
+        start_competition()
+        self.players = [User.objects.create_user(f'player{i}') for i in range(3)]
+        self.question = Question.objects.create(
+            title='Decaying', description='', answer='flag', points=500,
+            dynamic_scoring=True, minimum_points=100, decay=2,
+        )
+
+    def solve(self, user, question=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return record_submission(user, question or self.question, 'flag', True)
+
+    def scores(self):
+        return [PlayerScore.objects.get(user=user).score for user in self.players]
+
+    def test_question_value(self):
+        self.assertEqual(question_value(500, 100, 0, 50), 500)  # No decay
+        self.assertEqual(question_value(500, 100, 10, 1), 500)
+        self.assertEqual(question_value(500, 100, 10, 6), 400)
+        self.assertEqual(question_value(500, 100, 10, 11), 100)
+        self.assertEqual(question_value(500, 100, 10, 50), 100)  # Never below the minimum
+
+    def test_reprice_moves_every_solver_to_the_new_value(self):
+        leaderboard.top(10)  # Loaded, so it has to follow the rescore events
+        catalog_version = question_catalog.version
+
+        self.solve(self.players[0])
+        self.assertEqual(self.scores(), [500, 0, 0])
+        self.solve(self.players[1])
+        self.assertEqual(self.scores(), [400, 400, 0])
+        self.solve(self.players[2])
+        self.assertEqual(self.scores(), [100, 100, 100])
+
+        self.question.refresh_from_db()
+        self.assertEqual(self.question.value, 100)
+        # Both caches were updated from the events, without a reload
+        self.assertEqual([row['score'] for row in leaderboard.top(3)], [100, 100, 100])
+        self.assertEqual(question_catalog.version, catalog_version)
+        self.assertEqual(question_catalog.get().entries[self.question.id].value, 100)
+
+    def test_verify_and_repair(self):
+        for player in self.players[:2]:
+            self.solve(player)
+        self.assertEqual(verify()[0], [])
+
+        PlayerScore.objects.filter(user=self.players[0]).update(score=999)
+        Question.objects.filter(pk=self.question.pk).update(current_points=300)
+        self.assertEqual(verify()[0], [(self.players[0].id, 999, 400)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(len(repair()), 1)
+        self.assertEqual(verify()[0], [])
+        self.assertEqual(self.scores(), [400, 400, 0])
+        self.question.refresh_from_db()
+        self.assertEqual(self.question.current_points, 400)
+
+    def test_turning_dynamic_scoring_off_awards_full_points(self):
+        self.solve(self.players[0])
+        self.solve(self.players[1])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question.dynamic_scoring = False
+            self.question.save()
+
+        question = Question.objects.get(pk=self.question.pk)
+        self.assertEqual(question.value, 500)
+        self.assertEqual(question_catalog.get().entries[question.id].value, 500)
+        self.solve(self.players[2], question)
+        self.assertEqual(self.scores()[2], 500)
+
+
+class QueryCountTests(TestCase):
+    """
+    Steady-state query counts for the player pages, once the catalog, answer
+    matchers, session and user caches are warm. Inside a TestCase every
+    transaction.atomic block adds a SAVEPOINT and a RELEASE to the count.
+    """
+
+    def setUp(self):
+        self.questions = [
+            Question.objects.create(
+                title=f'Question {i}', description='', answer='flag', category='Web', max_attempts=100,
+            )
+            for i in range(40)
+        ]
+        start_competition()
+        self.client.force_login(User.objects.create_user('player'))
+
+    def test_category_page_is_one_query_however_many_questions(self):
+        url = reverse('questions_in_category', args=['Web'])
+        self.client.get(url)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_question_page(self):
+        url = reverse('view_question', args=[self.questions[0].id])
+        self.client.get(url)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_categories_page(self):
+        url = reverse('question_categories')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_wrong_submission(self):
+        url = reverse('submit_answer', args=[self.questions[0].id])
+        self.client.post(url, {'answer': 'guess'})
+        # Question, PlayerScore lock, attempts aggregate, insert, plus the atomic savepoint pair
+        with self.assertNumQueries(6):
+            self.assertEqual(self.client.post(url, {'answer': 'guess'}).status_code, 302)
+
+    def test_correct_submission(self):
+        url = reverse('submit_answer', args=[self.questions[0].id])
+        self.client.post(url, {'answer': 'guess'})
+        # As above, plus the savepoint pair around the insert and the score update
+        with self.assertNumQueries(9):
+            self.assertEqual(self.client.post(url, {'answer': 'flag'}).status_code, 302)
+
+
+def event_bus_worker(worker, workers, events, ready, results):
+    """One forked worker: tail the LiveEvent table, publish ``events`` events, report what arrived."""
+    bus = DatabaseEventBus(poll_interval=0.05, gap_timeout=1)
+    received = []
+    bus.subscribe('submission', lambda payload: received.append((payload['worker'], payload['n'])))
+    bus.start()
+    while bus.cursor is None:  # Backfilled, so everything published from here on is delivered
+        time.sleep(0.01)
+    ready.wait()
+    for n in range(events):
+        bus.publish('submission', {'worker': worker, 'n': n})
+    deadline = time.monotonic() + 30
+    while len(received) < workers * events and time.monotonic() < deadline:
+        time.sleep(0.05)
+    time.sleep(0.2)  # Catch any duplicate deliveries
+    results.put((worker, received))
+
+
+class ScoreHistoryTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('organiser', is_staff=True))
+
+    def test_rejects_out_of_range_parameters(self):
+        cases = [({'top': '-5'}, b'top must be at least 1'), ({'points': '1'}, b'points must be at least 2')]
+        for query, message in cases:
+            with self.subTest(**query):
+                response = self.client.get(reverse('score_history'), query)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.content, message)
+        self.assertEqual(self.client.get(reverse('score_history'), {'top': '1', 'points': '2'}).status_code, 200)
+
+
+class DatabaseEventBusTests(TransactionTestCase):
+    workers = 4
+    events = 25
+
+    def test_every_worker_receives_every_event(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest("Worker processes cannot share an in-memory SQLite database")
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            self.skipTest("Needs fork so workers inherit the test database settings")
+
+        context = multiprocessing.get_context('fork')
+        ready = context.Barrier(self.workers)
+        results = context.Queue()
+        connections.close_all()  # Every worker opens its own connection
+        processes = [
+            context.Process(target=event_bus_worker, args=(worker, self.workers, self.events, ready, results))
+            for worker in range(self.workers)
+        ]
+        for process in processes:
+            process.start()
+        received = dict(results.get(timeout=60) for _ in processes)
+        for process in processes:
+            process.join(10)
+
+        expected = sorted((worker, n) for worker in range(self.workers) for n in range(self.events))
+        for worker in range(self.workers):
+            self.assertEqual(sorted(received[worker]), expected, f"worker {worker}")
+
+    def test_loading_the_app_does_not_start_the_tailer(self):
+        # Management commands load the app too, migrate before the LiveEvent table exists among them
+        bus = DatabaseEventBus()
+        with mock.patch('challenges.eventbus.get_event_bus', return_value=bus):
+            apps.get_app_config('challenges').ready()
+        self.assertIsNone(bus._thread)
+
+
+class ExportMemoryTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('organiser', is_staff=True))
+        self.users = [User.objects.create_user(f'player{i}') for i in range(20)]
+        self.question = Question.objects.create(title='Export', description='', answer='flag')
+        self.rows = 0
+
+    def add_submissions(self, count):
+        Submission.objects.bulk_create([
+            Submission(
+                user=self.users[i % len(self.users)], question=self.question,
+                submitted_answer=f'guess {self.rows + i}',
+            )
+            for i in range(count)
+        ])
+        self.rows += count
+
+    def peak_memory(self, query):
+        """Peak traced memory while streaming the whole export."""
+        tracemalloc.start()
+        try:
+            response = self.client.get(reverse('export_submissions'), query)
+            for _ in response.streaming_content:
+                pass
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(response.status_code, 200)
+        return peak
+
+    def test_peak_memory_stays_flat_as_rows_grow(self):
+        for query in ({'format': 'csv'}, {'format': 'ndjson', 'gzip': '1'}):
+            with self.subTest(**query):
+                Submission.objects.all().delete()
+                self.rows = 0
+                self.add_submissions(2 * export.CHUNK_SIZE)
+                small = self.peak_memory(query)
+                self.add_submissions(6 * export.CHUNK_SIZE)
+                large = self.peak_memory(query)
+
+                # Four times the rows: the peak is bounded by one chunk, not by the export
+                self.assertLess(large, small * 1.5)
+                if 'gzip' not in query:
+                    lines = b''.join(self.client.get(reverse('export_submissions'), query).streaming_content)
+                    self.assertEqual(lines.count(b'\n'), self.rows + 1)
+
+
+class ImportQuestionsTests(TestCase):
+    def write_pack(self, suffix, text):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, 'w') as pack:
+            pack.write(text)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_malformed_yaml_is_a_command_error(self):
+        path = self.write_pack('.yaml', 'questions: [slug: broken\n  title: "unterminated')
+        with self.assertRaisesMessage(CommandError, 'Could not read'):
+            call_command('import_questions', path, stdout=io.StringIO())
+
+    def test_pack_sets_dynamic_scoring(self):
+        path = self.write_pack('.csv', (
+            'slug,title,description,answer,points,dynamic_scoring,minimum_points,decay\n'
+            'decaying,Decaying,Gets cheaper,flag,500,yes,100,20\n'
+        ))
+        call_command('import_questions', path, stdout=io.StringIO())
+        question = Question.objects.get(slug='decaying')
+        self.assertEqual(
+            (question.dynamic_scoring, question.minimum_points, question.decay), (True, 100, 20),
+        )
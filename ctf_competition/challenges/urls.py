@@ -15,8 +15,12 @@ urlpatterns = [
     path('paused/', views.paused_page, name='paused_page'),  # Paused page
     path('finished/', views.finished_page, name='finished_page'),  # Finished page
     path('scoreboard/stream/', views.scoreboard_stream, name='scoreboard_stream'),
+    path('scoreboard/json/', views.scoreboard_json, name='scoreboard_json'),
+    path('scoreboard/history/', views.score_history_view, name='score_history'),
     path('set-timer/', views.set_timer, name='set_timer'),
     path('submissions/stream/', views.submission_stream, name='submissions_stream'),  # Add this
     path('timer/stream/', views.timer_stream, name='timer_stream'),
+    path('live/', views.live_stream, name='live_stream'),
     path('timer/manage/', views.timer_manage, name='timer_manage'),
+    path('export/submissions/', views.export_submissions, name='export_submissions'),
 ]
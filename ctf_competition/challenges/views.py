@@ -1,16 +1,31 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import StreamingHttpResponse
+from django.http import Http404, StreamingHttpResponse
 from django.utils.timezone import now, timedelta
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
-from .models import Question, Submission, PlayerScore, ChallengeTimer
+from .models import Question, ChallengeTimer
+from .leaderboard import leaderboard
+from .history import score_history
+from .live import LiveSubscription, parse_streams, sse_events
+from .events import parse_last_event_id
+from .eventbus import get_event_bus
+from .submissions import record_submission, CORRECT, ALREADY_SOLVED, EXHAUSTED
+from .progress import category_progress, question_progress
+from .catalog import question_catalog
+from .answers import answer_matchers
+from .ratelimit import rate_limit
+from .metrics import SUBMISSIONS, tracked_stream
+from .streams import detach_from_request
+from . import export
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from .competition import competition_state, competition_required
 import json
-import time
-from django.http import JsonResponse
+import logging
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse
 from django.contrib.auth.views import LoginView
-from collections import deque
-from asgiref.sync import async_to_sync
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from .led_controller import (
     set_color_white,
     set_color_yellow,
@@ -19,7 +34,25 @@ from .led_controller import (
 )
 
 
-submission_event_queue = deque()
+logger = logging.getLogger(__name__)
+
+
+def sse_response(name, stream):
+    """
+    Wrap an async generator of SSE frames in a non-buffered streaming response
+    that gives up the request's thread once streaming starts.
+    """
+    response = StreamingHttpResponse(
+        tracked_stream(name, detach_from_request(stream)), content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Stop reverse proxies from buffering frames
+    return response
+
+HISTORY_MAX_TOP = 1000
+HISTORY_MAX_POINTS = 2000
+SCOREBOARD_MAX_TOP = 1000
+SCOREBOARD_MAX_AGE = 5  # Seconds a proxy or browser may reuse the JSON scoreboard without asking
 
 @user_passes_test(lambda user: user.is_staff or user.is_superuser, login_url='not_started_page')
 def set_timer(request):
@@ -40,7 +73,8 @@ def set_timer(request):
             ChallengeTimer.objects.all().delete()  # Ensure only one timer exists
             ChallengeTimer.objects.create(start_time=now(), duration=duration)
             messages.success(request, "Timer started successfully!")
-            async_to_sync(set_color_white)()  # Turn LED strip white
+            broadcast_timer_event('start')
+            set_color_white()  # Turn LED strip white
 
             return redirect('set_timer')
 
@@ -50,6 +84,7 @@ def set_timer(request):
                 timer.duration = timer.time_left()  # Update duration to remaining time
                 timer.start_time = None  # Pause the timer
                 timer.save()
+                broadcast_timer_event('pause')
                 messages.success(request, "Timer paused successfully!")
             else:
                 messages.error(request, "No active timer to pause.")
@@ -57,6 +92,7 @@ def set_timer(request):
 
         elif action == 'reset':
             ChallengeTimer.objects.all().delete()  # Delete all timers
+            broadcast_timer_event('reset')
             messages.success(request, "Timer reset successfully!")
             return redirect('set_timer')
 
@@ -65,77 +101,52 @@ def set_timer(request):
             if timer and timer.duration and not timer.start_time:
                 timer.start_time = now()  # Resume the timer
                 timer.save()
+                broadcast_timer_event('resume')
                 messages.success(request, "Timer resumed successfully!")
             else:
                 messages.error(request, "No paused timer to resume.")
             return redirect('set_timer')
 
-    timer = ChallengeTimer.objects.first()
-    return render(request, 'challenges/set_timer.html', {'timer': timer})
+    return render(request, 'challenges/set_timer.html', {'timer': competition_state.snapshot()})
 
 
 @login_required
+@competition_required
 def question_list(request):
-    timer = ChallengeTimer.objects.first()
-
-    # Redirect non-admin users if timer has not started
-    if not request.user.is_staff and not request.user.is_superuser:
-        if not timer or timer.start_time is None:
-            return redirect('not_started_page')
-        elif timer.is_active() and timer.time_left().total_seconds() <= 0:
-            return redirect('finished_page')
-
     questions = Question.objects.all()
     return render(request, 'challenges/questions.html', {'questions': questions})
 
 
+@rate_limit('submit')
 @login_required
+@competition_required(staff_bypass=False)
 def submit_answer(request, question_id):
-    timer = ChallengeTimer.objects.first()
-
-    if not timer or not timer.is_active():
-        return redirect('not_started_page')
-
-    question = get_object_or_404(Question, id=question_id)
-
-    # 1. Count how many submissions user has made for this question
-    user_submissions_count = Submission.objects.filter(user=request.user, question=question).count()
-
-    # 2. Check if user still has attempts left
-    if user_submissions_count >= question.max_attempts:
-        messages.warning(request, "You have used all your attempts for this question!")
-        return redirect('questions_in_category', category_name=question.category)
+    question = get_object_or_404(
+        Question.objects.only('category', 'points', 'max_attempts', 'dynamic_scoring', 'current_points'),
+        id=question_id,
+    )
 
     if request.method == 'POST':
-        user_answer = request.POST.get('answer')
-        is_correct = user_answer.strip().lower() == question.answer.lower()
+        user_answer = request.POST.get('answer', '')
+        is_correct = answer_matchers.check(question.id, user_answer)
 
-        # Check if user already got the question correct in a previous attempt
-        already_correct = Submission.objects.filter(
-            user=request.user, question=question, is_correct=True
-        ).exists()
+        outcome, submission, score = record_submission(request.user, question, user_answer, is_correct)
+        SUBMISSIONS.labels(outcome).inc()
 
-        if already_correct:
+        if outcome == EXHAUSTED:
+            messages.warning(request, "You have used all your attempts for this question!")
+        elif outcome == ALREADY_SOLVED:
             messages.info(request, "You have already earned points for this question!")
             broadcast_submission_event(request.user.username, "already")
+        elif outcome == CORRECT:
+            broadcast_score_event(request.user, score, submission.timestamp)
+            messages.success(request, "Correct answer! Well done!")
+            broadcast_submission_event(request.user.username, "correct")
+            blink_green_strobe()
         else:
-            Submission.objects.create(
-                user=request.user,
-                question=question,
-                submitted_answer=user_answer,
-                is_correct=is_correct
-            )
-            if is_correct:
-                player_score, created = PlayerScore.objects.get_or_create(user=request.user)
-                player_score.score += question.points
-                player_score.save()
-                messages.success(request, "Correct answer! Well done!")
-                broadcast_submission_event(request.user.username, "correct")
-                async_to_sync(blink_green_strobe)()
-            else:
-                messages.error(request, "Incorrect answer. Try again!")
-                broadcast_submission_event(request.user.username, "incorrect")
-                async_to_sync(blink_red_strobe)()
+            messages.error(request, "Incorrect answer. Try again!")
+            broadcast_submission_event(request.user.username, "incorrect")
+            blink_red_strobe()
 
     return redirect('questions_in_category', category_name=question.category)
 
@@ -145,18 +156,25 @@ def broadcast_submission_event(username, status):
         'username': username,
         'status': status,
     }
-    submission_event_queue.append(message)
-    print(f"[DEBUG] Successfully broadcasted: {message}")
+    get_event_bus().publish('submission', message)
+    logger.debug("Broadcast submission event: %s", message)
+
+def broadcast_score_event(user, score, solved_at):
+    get_event_bus().publish('score', {
+        'user_id': user.id,
+        'username': user.username,
+        'is_staff': user.is_staff or user.is_superuser,
+        'score': score,
+        'solved_at': solved_at.isoformat(),
+    })
+
+def broadcast_timer_event(action):
+    get_event_bus().publish('timer', {'action': action})
 
-def submission_stream(request):
-    def event_stream():
-        print("[DEBUG] Starting submission stream")
-        while True:
-            if submission_event_queue:
-                event = submission_event_queue.popleft()
-                yield f"data: {json.dumps(event)}\n\n"
-            time.sleep(0.5)
-    return StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+async def submission_stream(request):
+    logger.debug("Starting submission stream")
+    subscription = LiveSubscription(['submissions'], parse_last_event_id(request))
+    return sse_response('submission', sse_events(subscription, unnamed={'submissions'}))
 
 
 def home_view(request):
@@ -169,7 +187,7 @@ def register(request):
     if request.method == 'POST':
         form = UserCreationForm(request.POST)
         if form.is_valid():
-            form.save()
+            form.save()  # scoring.create_player_score gives the account its PlayerScore
             messages.success(request, 'Your account has been created. You can now log in.')
             return redirect('login')
     else:
@@ -178,58 +196,19 @@ def register(request):
 
 
 @login_required
+@competition_required
 def question_categories(request):
-    timer = ChallengeTimer.objects.first()
-
-    # Redirect non-admin users based on timer state
-    if not request.user.is_staff and not request.user.is_superuser:
-        if not timer or not timer.has_started():  # Timer not started
-            print("Timer not started")
-            return redirect('not_started_page')
-        elif timer.time_left() and timer.time_left().total_seconds() <= 0:  # Timer finished
-            print("Timer finished")
-            return redirect('finished_page')
-
-    # Normal logic for staff/superusers
-    print("Timer is active and user has access.")
-
-    categories = {
-        'HTML': Question.objects.filter(category='HTML'),
-        'CSS': Question.objects.filter(category='CSS'),
-        'JavaScript': Question.objects.filter(category='JavaScript'),
-        'Other': Question.objects.filter(category='Other'),
-    }
-    return render(request, 'challenges/question_categories.html', {'categories': categories})
+    return render(request, 'challenges/question_categories.html', {
+        'categories': question_catalog.get().by_category,
+        'rank': leaderboard.rank(request.user.id),
+    })
 
 
 @login_required
+@competition_required
 def questions_in_category(request, category_name):
-    timer = ChallengeTimer.objects.first()
-
-    # Redirect non-admin users if timer has not started
-    if not request.user.is_staff and not request.user.is_superuser:
-        if not timer or timer.start_time is None:  # Timer not started
-            return redirect('not_started_page')
-        elif timer.is_active() and timer.time_left().total_seconds() <= 0:  # Timer finished
-            return redirect('finished_page')
-
-    # Fetch all questions in the category
-    all_questions = Question.objects.filter(category=category_name)
-    available_questions = []
-    completed_correctly = []
-    exhausted_attempts = []
-
-    for question in all_questions:
-        user_submissions = Submission.objects.filter(user=request.user, question=question)
-        user_attempts = user_submissions.count()
-        answered_correctly = user_submissions.filter(is_correct=True).exists()
-
-        if answered_correctly:
-            completed_correctly.append(question)  # Mark as successfully completed
-        elif user_attempts >= question.max_attempts:
-            exhausted_attempts.append(question)  # Mark as exhausted attempts
-        else:
-            available_questions.append(question)  # Still available for attempts
+    # Attempts and solved status for every question come from one grouped query
+    available_questions, completed_correctly, exhausted_attempts = category_progress(request.user, category_name)
 
     return render(request, 'challenges/questions_in_category.html', {
         'category_name': category_name,
@@ -246,62 +225,34 @@ def admin_scoreboard_page(request):
 
 
 def not_started_page(request):
-    timer = ChallengeTimer.objects.first()
-    return render(request, 'challenges/not_started.html', {'timer': timer})
+    return render(request, 'challenges/not_started.html', {'timer': competition_state.snapshot()})
 
 
 @user_passes_test(lambda user: user.is_staff or user.is_superuser, login_url='login')
-def scoreboard_stream(request):
-    def event_stream():
-        while True:
-            scores = PlayerScore.objects.filter(user__is_staff=False, user__is_superuser=False).order_by('-score')
-            timer = ChallengeTimer.objects.first()
-
-            if timer and timer.is_active():
-                remaining_time = int(timer.time_left().total_seconds())
-            else:
-                remaining_time = None
-
-            data = {
-                'scores': [{'username': s.user.username, 'score': s.score} for s in scores],
-                'remaining_time': remaining_time,
-            }
-            yield f"data: {json.dumps(data)}\n\n"
-            time.sleep(1)  # Non-blocking delay
-
-    return StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+async def scoreboard_stream(request):
+    return sse_response('scoreboard', sse_events(LiveSubscription(['scores']), unnamed={'scores'}))
 
 @user_passes_test(lambda user: user.is_staff or user.is_superuser, login_url='login')
-def timer_stream(request):
-    def event_stream():
-        while True:
-            timer = ChallengeTimer.objects.first()
-            if timer:
-                if timer.is_active():
-                    remaining_time = int(timer.time_left().total_seconds())
-                    if remaining_time <= 0:
-                        state = "Finished"
-                        remaining_time = 0  # Ensure the timer shows 00:00:00
-                    else:
-                        state = "Active"
-                elif timer.start_time is None and timer.duration:
-                    state = "Paused"
-                    remaining_time = int(timer.duration.total_seconds())
-                else:
-                    state = "Finished"
-                    remaining_time = 0  # Ensure the timer shows 00:00:00
-            else:
-                state = "Inactive"
-                remaining_time = None
-
-            data = {
-                'remaining_time': remaining_time,
-                'state': state,
-            }
-            yield f"data: {json.dumps(data)}\n\n"
-            time.sleep(1)
+async def timer_stream(request):
+    """
+    Push the timer state, absolute deadline and server clock only when they
+    change; clients run the countdown locally. Between changes the stream
+    carries nothing but keepalives.
+    """
+    return sse_response('timer', sse_events(LiveSubscription(['timer']), unnamed={'timer'}))
 
-    return StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+@user_passes_test(lambda user: user.is_staff or user.is_superuser, login_url='login')
+async def live_stream(request):
+    """
+    Scoreboard, submission feed and timer on one connection, as named SSE
+    events. ``topics`` picks a comma-separated subset of scores,
+    submissions and timer (default: all).
+    """
+    try:
+        streams = parse_streams(request.GET.get('topics'))
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+    return sse_response('live', sse_events(LiveSubscription(streams, parse_last_event_id(request))))
 
 @user_passes_test(lambda user: user.is_staff or user.is_superuser)
 def timer_manage(request):
@@ -311,42 +262,141 @@ def timer_manage(request):
 
         timer = ChallengeTimer.objects.first()
         if action == "pause" and timer:
-            async_to_sync(set_color_yellow)()
+            set_color_yellow()
             timer.duration = timer.time_left()
             timer.start_time = None
             timer.save()
+            broadcast_timer_event('pause')
             return JsonResponse({"status": "success", "message": "Timer paused"})
         elif action == "resume" and timer:
-            async_to_sync(set_color_white)()
+            set_color_white()
             timer.start_time = now()
             timer.save()
+            broadcast_timer_event('resume')
             return JsonResponse({"status": "success", "message": "Timer resumed"})
         elif action == "reset":
             ChallengeTimer.objects.all().delete()
+            broadcast_timer_event('reset')
             return JsonResponse({"status": "success", "message": "Timer reset"})
 
     return JsonResponse({"status": "error", "message": "Invalid request"}, status=400)
 
 @login_required
 def view_question(request, question_id):
-    question = get_object_or_404(Question, id=question_id)
-
-    # Count how many times the user submitted this question
-    submissions_count = Submission.objects.filter(
-        user=request.user, question=question
-    ).count()
-
-    # Calculate attempts left
-    attempts_left = question.max_attempts - submissions_count
+    question = question_catalog.get().detail(question_id)
+    if question is None:
+        raise Http404("No Question matches the given query.")
 
-    # Attach attempts_left to the question object itself
-    question.attempts_left = attempts_left
+    # Wraps the cached question with this user's attempts_left
+    question = question_progress(request.user, question)
 
     return render(request, 'challenges/questions.html', {
         # Provide a single-item list so your template can still loop as if it's multiple
         'questions': [question],
     })
 
+@user_passes_test(lambda user: user.is_staff or user.is_superuser, login_url='login')
+def metrics_view(request):
+    """Prometheus scrape endpoint."""
+    return HttpResponse(generate_latest(), content_type=CONTENT_TYPE_LATEST)
+
+@user_passes_test(lambda user: user.is_staff or user.is_superuser, login_url='login')
+def export_submissions(request):
+    """
+    Stream every submission as CSV or NDJSON. Query parameters: ``format``
+    (csv/ndjson), ``gzip=1``, and the filters ``since``, ``until``,
+    ``category`` and ``user``.
+    """
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in export.FORMATS:
+        return HttpResponseBadRequest(f"Unknown format: {export_format}")
+    try:
+        filters = export.parse_filters(
+            **{key: request.GET.get(key) for key in ('since', 'until', 'category', 'user')}
+        )
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+    return export.export_response(request, export_format, filters, compress=request.GET.get('gzip') == '1')
+
+@user_passes_test(lambda user: user.is_staff or user.is_superuser, login_url='login')
+def score_history_view(request):
+    """
+    Score-over-time series of the current top players, as JSON. Query
+    parameters: ``top`` (players, default 10), ``since``/``until`` (ISO date
+    or datetime, default the whole event) and ``points`` (samples per
+    player, default 200). Every player's ``scores`` are read at the shared
+    ``times``, in epoch milliseconds.
+    """
+    try:
+        top = int(request.GET.get('top', 10))
+        count = int(request.GET.get('points', 200))
+        if top < 1:
+            raise ValueError("top must be at least 1")
+        if count < 2:
+            raise ValueError("points must be at least 2")
+        top, count = min(top, HISTORY_MAX_TOP), min(count, HISTORY_MAX_POINTS)
+        window = export.parse_filters(since=request.GET.get('since'), until=request.GET.get('until'))
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    span = score_history.span()
+    since = window['timestamp__gte'].timestamp() if 'timestamp__gte' in window else (span[0] if span else 0)
+    until = window['timestamp__lte'].timestamp() if 'timestamp__lte' in window else now().timestamp()
+    if until < since:
+        return HttpResponseBadRequest("until is before since")
+
+    players = leaderboard.top(top)
+    instants, scores = score_history.sample([player['user_id'] for player in players], since, until, count)
+    return JsonResponse({
+        'times': [int(instant * 1000) for instant in instants],
+        'series': [
+            {
+                'user_id': player['user_id'],
+                'username': player['username'],
+                'score': player['score'],
+                'scores': scores[player['user_id']],
+            }
+            for player in players
+        ],
+    })
+
+def scoreboard_top(request):
+    top = int(request.GET.get('top', 10))
+    if top < 1:
+        raise ValueError("top must be at least 1")
+    return min(top, SCOREBOARD_MAX_TOP)
+
+def scoreboard_etag(version, top):
+    return f'"{leaderboard.epoch}-{version}-{top}"'
+
+def scoreboard_json_etag(request):
+    try:
+        return scoreboard_etag(leaderboard.version, scoreboard_top(request))
+    except ValueError:
+        return None
+
+@cache_control(public=True, max_age=SCOREBOARD_MAX_AGE)
+@condition(etag_func=scoreboard_json_etag)
+def scoreboard_json(request):
+    """
+    Public ranking of the top players, as JSON. Query parameter: ``top``
+    (players, default 10). The ETag comes from the leaderboard's version,
+    so a poll with a current ``If-None-Match`` gets a 304 without a query.
+    """
+    try:
+        top = scoreboard_top(request)
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    version, rows = leaderboard.standings(top)
+    response = JsonResponse({
+        'version': version,
+        'players': len(leaderboard),
+        'scores': [{'rank': row['rank'], 'username': row['username'], 'score': row['score']} for row in rows],
+    })
+    response['ETag'] = scoreboard_etag(version, top)  # May be newer than the one checked above
+    return response
+
 def paused_page(request):
     """
     Displayed when the timer is paused.
@@ -3,4 +3,25 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ctf_competition.settings')
 
-application = get_asgi_application()
+# Initialise Django before importing anything that touches models
+django_application = get_asgi_application()
+
+from challenges.eventbus import get_event_bus
+
+# Receive other workers' events from startup, so timer and catalog
+# invalidations also reach workers that only serve pages
+get_event_bus().start()
+
+try:
+    from channels.auth import AuthMiddlewareStack
+    from channels.routing import ProtocolTypeRouter, URLRouter
+    from channels.security.websocket import AllowedHostsOriginValidator
+except ImportError:  # WebSockets are optional: the live channel also works over SSE
+    application = django_application
+else:
+    from challenges.routing import websocket_urlpatterns
+
+    application = ProtocolTypeRouter({
+        'http': django_application,
+        'websocket': AllowedHostsOriginValidator(AuthMiddlewareStack(URLRouter(websocket_urlpatterns))),
+    })
@@ -54,7 +54,37 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Live submission/score/timer events. InProcessEventBus only reaches clients
+# connected to the same worker; switch to DatabaseEventBus when running more
+# than one daphne/gunicorn worker.
+CHALLENGES_EVENT_BUS = {
+    'BACKEND': 'challenges.eventbus.InProcessEventBus',
+    # 'BACKEND': 'challenges.eventbus.DatabaseEventBus',
+    # 'OPTIONS': {'poll_interval': 0.25, 'retention': 600},
+}
+
+# Token buckets for rate-limited views such as answer submission, keyed on
+# the logged-in user. The in-memory table is per worker; CacheRateLimiter
+# shares limits through the cache so they hold across workers. 'IP' adds a
+# (requests, seconds) limit per client address; leave it off when players
+# share a NAT. Behind a reverse proxy, list the proxy addresses in
+# 'TRUSTED_PROXIES' so the client is taken from X-Forwarded-For.
+CHALLENGES_RATE_LIMIT = {
+    'BACKEND': 'challenges.ratelimit.InMemoryRateLimiter',
+    # 'BACKEND': 'challenges.ratelimit.CacheRateLimiter',
+    # 'OPTIONS': {'cache': 'default'},
+    # 'IP': (300, 60),
+    # 'TRUSTED_PROXIES': ['127.0.0.1'],
+}
+
+# LED strip driven by challenges/led_controller.py. Use 'fake' on machines
+# without a Bluetooth adapter; packets are then only recorded in memory.
+# 'none' discards them, which is also what 'ble' falls back to without bleak.
+LED_TRANSPORT = 'ble'
+LED_DEVICE_MAC = 'BE:27:8B:03:4C:4B'
+
 MIDDLEWARE = [
+    'challenges.metrics.MetricsMiddleware',  # First, so its timings cover the whole stack
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -88,6 +118,9 @@ WSGI_APPLICATION = 'ctf_competition.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
+# With SQLite, add 'OPTIONS': {'transaction_mode': 'IMMEDIATE'} so concurrent
+# submissions queue for the write lock instead of failing with "database is
+# locked" and being retried by challenges.submissions.
 
 DATABASES = {
     'default': {
@@ -101,6 +134,31 @@ DATABASES = {
 }
 
 
+# Sessions are read from the cache and written through to the database, so
+# requests and SSE reconnects skip the django_session query. The default
+# cache is per process: configure a shared cache (Redis, memcached) in CACHES
+# when running several workers, or use
+# 'django.contrib.sessions.backends.signed_cookies' to keep sessions entirely
+# client-side (they cannot then be revoked server-side).
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# challenges.auth caches users in process for a few seconds and caps how many
+# password hashes (logins, registrations) run at once; the cap defaults to
+# half the CPU cores.
+AUTHENTICATION_BACKENDS = ['challenges.auth.CachedModelBackend']
+PASSWORD_HASHERS = [
+    'challenges.auth.ThrottledPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+# CHALLENGES_MAX_CONCURRENT_HASHES = 2
+
+# Characters of pre-rendered question HTML kept per process (challenges/fragments.py)
+CHALLENGES_FRAGMENT_CACHE_SIZE = 4 * 1024 * 1024
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -3,6 +3,7 @@ from django.urls import path, include
 from challenges.views import home_view
 from django.contrib import admin
 from challenges.views import register
+from challenges.views import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -11,4 +12,5 @@ urlpatterns = [
     path('accounts/logout/', auth_views.LogoutView.as_view(), name='logout'),
      path('accounts/register/', register, name='register'),
     path('challenges/', include('challenges.urls')),  # Challenges URLs
+    path('metrics/', metrics_view, name='metrics'),  # Prometheus, staff only
 ]
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ctf_competition.settings')
 
 application = get_wsgi_application()
+
+from challenges.eventbus import get_event_bus
+
+# Receive other workers' events from startup, so timer and catalog
+# invalidations also reach workers that only serve pages
+get_event_bus().start()